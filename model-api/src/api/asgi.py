@@ -0,0 +1,197 @@
+# file: api/asgi.py
+"""
+asyncio serving mode.
+
+Run with:  uvicorn api.asgi:app --host 0.0.0.0 --port 8080 --workers 1
+
+The LLM-backed routes (POST /check-claim, POST /claims) are served natively on the
+event loop: Qdrant via AsyncQdrantClient, Gemini via generate_content_async, and the
+embedding model in an executor. A claim waiting on I/O holds no thread, so one process
+can keep hundreds of checks in flight. Every other route is the unchanged Flask app
+from api.controller, mounted as WSGI, so both modes expose the same API.
+
+The sync entry point (python -m api.controller) keeps working as before.
+"""
+from __future__ import annotations
+import json, math, time, uuid, asyncio, functools
+from typing import Any, Dict
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from api.controller import app as flask_app, status_from_decision
+from api.model.db import SessionLocal, Claim
+from api.utils.admission import (
+    AdmissionRejected, admission_stats, async_inflight_limiter, async_judge_slot, client_address,
+    rate_limiter,
+)
+from api.utils.detector_gemini import judge_claim_with_gemini_async
+from api.utils.request_log import request_log
+from api.utils.singleflight import async_claim_flight, normalize_claim
+
+
+def _client_id(request: Request) -> str:
+    return client_address(request.client.host if request.client else None,
+                          request.headers.get("x-forwarded-for"))
+
+
+def _busy(e: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(
+        {"error": "server busy, try again later", "reason": e.reason},
+        status_code=503,
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+def _logged(handler):
+    """Async-route counterpart of install_request_log(): the mounted Flask routes log themselves."""
+    @functools.wraps(handler)
+    async def wrapper(request: Request):
+        if not request_log.enabled:
+            return await handler(request)
+        t0 = time.perf_counter()
+        response = await handler(request)
+        if request_log.sampled():
+            try:
+                body = await request.json()   # cached by the handler's own read
+            except ValueError:
+                body = None
+            try:
+                payload = json.loads(response.body)
+            except ValueError:
+                payload = None
+            request_log.record(
+                method=request.method,
+                route=request.url.path,
+                path=request.url.path + (f"?{request.url.query}" if request.url.query else ""),
+                body=body,
+                status=response.status_code,
+                duration_s=time.perf_counter() - t0,
+                client=_client_id(request),
+                auth=bool(request.headers.get("authorization")),
+                response=payload,
+            )
+        return response
+    return wrapper
+
+
+async def _read_claim(request: Request) -> str:
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    claim = data.get("claim") if isinstance(data, dict) else None
+    return claim.strip() if isinstance(claim, str) else ""
+
+
+async def judge_claim_async(claim: str) -> Dict[str, Any]:
+    return await async_claim_flight.do(
+        normalize_claim(claim), lambda: judge_claim_with_gemini_async(claim, slot=async_judge_slot))
+
+
+def _insert_pending(claim_id: str, claim_text: str) -> None:
+    db = SessionLocal()
+    try:
+        db.add(Claim(id=claim_id, claim_text=claim_text, status="pending"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _delete_claim(claim_id: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Claim).filter(Claim.id == claim_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _store_result(claim_id: str, result: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        claim = db.query(Claim).filter(Claim.id == claim_id).first()
+        claim.status = status_from_decision(result["result"])
+        claim.explanation = result.get("explanation", "")
+        claim.touch()
+        db.commit()
+    finally:
+        db.close()
+
+
+@_logged
+async def check_claim(request: Request):
+    wait = rate_limiter.check(_client_id(request))
+    if wait > 0:
+        return JSONResponse({"error": "rate limit exceeded, slow down"}, status_code=429,
+                            headers={"Retry-After": str(max(1, math.ceil(wait)))})
+
+    claim = await _read_claim(request)
+    if not claim:
+        return JSONResponse({"error": "claim is required"}, status_code=400)
+
+    try:
+        result = await judge_claim_async(claim)
+    except AdmissionRejected as e:
+        return _busy(e)
+    return JSONResponse(result)
+
+
+@_logged
+async def create_claim(request: Request):
+    wait = rate_limiter.check(_client_id(request))
+    if wait > 0:
+        return JSONResponse({"error": "rate limit exceeded, slow down"}, status_code=429,
+                            headers={"Retry-After": str(max(1, math.ceil(wait)))})
+
+    claim_text = await _read_claim(request)
+    if not claim_text:
+        return JSONResponse({"error": "claim is required"}, status_code=400)
+
+    # Step 1: Create DB record (SQLite/SQLAlchemy are sync: keep them off the loop)
+    claim_id = str(uuid.uuid4())
+    await asyncio.to_thread(_insert_pending, claim_id, claim_text)
+
+    # Step 2: Run Gemini fact checker
+    try:
+        result = await judge_claim_async(claim_text)
+    except AdmissionRejected as e:
+        await asyncio.to_thread(_delete_claim, claim_id)
+        return _busy(e)
+
+    # Step 3: Update DB record with status
+    await asyncio.to_thread(_store_result, claim_id, result)
+
+    return JSONResponse({"id": claim_id, "claim": claim_text})
+
+
+async def get_admission_stats(request: Request):
+    return JSONResponse({
+        "admission": admission_stats(async_inflight_limiter),
+        "singleflight": async_claim_flight.stats(),
+    })
+
+
+app = Starlette(
+    routes=[
+        Route("/check-claim", check_claim, methods=["POST"]),
+        Route("/claims", create_claim, methods=["POST"]),
+        Route("/admission/stats", get_admission_stats, methods=["GET"]),
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["http://localhost:5173"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+            expose_headers=["Authorization", "Content-Type"],
+        ),
+    ],
+)
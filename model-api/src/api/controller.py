@@ -1,8 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from sqlalchemy import exists
 from api.auth import create_token, require_auth, verify_password
-from api.utils.detector_gemini import judge_claim_with_gemini
+from api.utils.conditional import claim_etag, collection_etag, not_modified, with_etag
+from api.utils.admission import AdmissionRejected, admission_stats, judge_slot, require_admission
+from api.utils.detector_gemini import judge_claim_with_gemini, subclaim_stats
+from api.utils.json_provider import install_json_provider
+from api.utils.profiler import install_profiler, profiler, require_profiler_token
+from api.utils.request_log import install_request_log
+from api.utils.singleflight import claim_flight, normalize_claim
 
 from sqlalchemy.orm import Session
 import uuid
@@ -18,10 +24,29 @@ CORS(
     supports_credentials=True,
     expose_headers=["Authorization", "Content-Type"],
 )
+install_json_provider(app)
+install_request_log(app)
+install_profiler(app)
 init_db()
 seed_fact_checkers()
 seed_claims()
 
+def status_from_decision(decision: str) -> str:
+    if decision == "NOT ENOUGH EVIDENCE":
+        return "escalated_manual"
+    elif decision == "TRUE":
+        return "true"
+    elif decision == "FALSE":
+        return "false"
+    return "unknown"
+
+def judge_claim(claim: str):
+    """
+    Coalesce identical in-flight claims; only the leader calls Gemini, taking one judge
+    slot per (sub-)claim call.
+    """
+    return claim_flight.do(normalize_claim(claim), lambda: judge_claim_with_gemini(claim, slot=judge_slot))
+
 @app.post("/auth/signin")
 def signin():
     data = request.get_json(force=True)
@@ -46,18 +71,20 @@ def signin():
         db.close()
 
 @app.post("/check-claim")
+@require_admission
 def check_claim():
     data = request.get_json(force=True)
     claim = data.get("claim", "").strip()
     if not claim:
         return jsonify(error="claim is required"), 400
 
-    result = judge_claim_with_gemini(claim)
+    result = judge_claim(claim)
 
     return jsonify(result)
 
 
 @app.post("/claims")
+@require_admission
 def create_claim():
     data = request.get_json(force=True)
     claim_text = data.get("claim", "").strip()
@@ -72,23 +99,23 @@ def create_claim():
     db.commit()
 
     # Step 2: Run Gemini fact checker
-    result = judge_claim_with_gemini(claim_text)
+    try:
+        result = judge_claim(claim_text)
+    except AdmissionRejected:
+        db.delete(new_claim)
+        db.commit()
+        db.close()
+        raise
 
     # Step 3: Update DB record with status
     decision = result["result"]
     explanation = result.get("explanation", "")
 
-    if decision == "NOT ENOUGH EVIDENCE":
-        status = "escalated_manual"
-    elif decision == "TRUE":
-        status = "true"
-    elif decision == "FALSE":
-        status = "false"
-    else:
-        status = "unknown"
+    status = status_from_decision(decision)
 
     new_claim.status = status
     new_claim.explanation = explanation
+    new_claim.touch()
     db.add(new_claim)
     db.commit()
 
@@ -97,6 +124,62 @@ def create_claim():
         "claim": claim_text,
     })
 
+@app.get("/admission/stats")
+def get_admission_stats():
+    """
+    Queue depth, in-flight judge calls and rejection counters for the LLM-backed endpoints.
+    """
+    return jsonify(admission=admission_stats(), singleflight=claim_flight.stats(), subclaims=subclaim_stats())
+
+@app.get("/admin/profiler")
+@require_profiler_token
+def get_profiler_status():
+    return jsonify(profiler.stats())
+
+@app.post("/admin/profiler")
+@require_profiler_token
+def start_profiler_window():
+    """
+    Body: { "sample_rate": 0.1, "duration_s": 60, "reset": false }
+    Profiles that fraction of requests until the window closes.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        sample_rate = float(data.get("sample_rate", 0.1))
+        duration_s = float(data.get("duration_s", 60))
+    except (TypeError, ValueError):
+        return jsonify(error="sample_rate and duration_s must be numbers"), 400
+    if not (0 < sample_rate <= 1) or duration_s <= 0:
+        return jsonify(error="sample_rate must be in (0, 1] and duration_s > 0"), 400
+
+    if data.get("reset"):
+        profiler.reset()
+    profiler.start_window(sample_rate, duration_s)
+    return jsonify(profiler.stats())
+
+@app.delete("/admin/profiler")
+@require_profiler_token
+def stop_profiler():
+    """
+    Closes the sampling window; ?reset=1 also discards collected stacks.
+    """
+    profiler.stop_window()
+    if request.args.get("reset"):
+        profiler.reset()
+    return jsonify(profiler.stats())
+
+@app.get("/admin/profiler/collapsed")
+@require_profiler_token
+def download_profile():
+    """
+    Collapsed stacks (`frame;frame;... count` per line) for flamegraph.pl / speedscope.
+    """
+    return Response(
+        profiler.collapsed(),
+        mimetype="text/plain",
+        headers={"Content-Disposition": "attachment; filename=profile.collapsed"},
+    )
+
 @app.get("/fact-checkers/<user_id>/escalated")
 @require_auth
 def list_escalated_for_user(user_id):
@@ -113,14 +196,17 @@ def list_escalated_for_user(user_id):
         subq = db.query(FactCheckerVote.claim_id).filter(FactCheckerVote.user_id == user_id).subquery()
 
         # claims with status escalated_manual AND not in user's voted set
-        q = (
+        base = (
             db.query(Claim)
               .filter(Claim.status == "escalated_manual")
               .filter(~Claim.id.in_(subq))
-              .order_by(Claim.id)
-              .offset(offset)
-              .limit(limit)
         )
+        etag = collection_etag(base)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        q = base.order_by(Claim.id).offset(offset).limit(limit)
 
         items = q.all()
         results = [{
@@ -132,13 +218,13 @@ def list_escalated_for_user(user_id):
             "false_count": c.false_count,
         } for c in items]
 
-        return jsonify({
+        return with_etag(jsonify({
             "user_id": user_id,
             "count": len(results),
             "items": results,
             "limit": limit,
             "offset": offset
-        })
+        }), etag)
     finally:
         db.close()
 
@@ -191,6 +277,7 @@ def vote_claim(claim_id):
             claim.truth_count += 1
         else:
             claim.false_count += 1
+        claim.touch()
 
         db.add(claim)
         db.commit()
@@ -209,7 +296,13 @@ def vote_claim(claim_id):
 def get_escalated_claims():
     db: Session = SessionLocal()
     try:
-        escalated = db.query(Claim).filter(Claim.status == "escalated_manual").all()
+        query = db.query(Claim).filter(Claim.status == "escalated_manual")
+        etag = collection_etag(query)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        escalated = query.all()
         results = []
         for c in escalated:
             results.append({
@@ -220,7 +313,7 @@ def get_escalated_claims():
                 "truth_count": c.truth_count,
                 "false_count": c.false_count,
             })
-        return jsonify(results)
+        return with_etag(jsonify(results), etag)
     finally:
         db.close()
 
@@ -233,18 +326,24 @@ def get_claim_status(claim_id):
     """
     db: Session = SessionLocal()
     try:
-        claim = db.query(Claim).filter(Claim.id == claim_id).first()
-        if not claim:
+        # cheap version probe first: a matching poll never loads the row
+        version = db.query(Claim.version).filter(Claim.id == claim_id).scalar()
+        if version is None:
             return jsonify(error="Claim not found"), 404
+        etag = claim_etag(claim_id, version)
+        cached = not_modified(etag)
+        if cached:
+            return cached
 
-        return jsonify({
+        claim = db.query(Claim).filter(Claim.id == claim_id).first()
+        return with_etag(jsonify({
             "id": claim.id,
             "claim": claim.claim_text,
             "status": claim.status,
             "explanation": claim.explanation,
             "truth_count": claim.truth_count,
             "false_count": claim.false_count
-        })
+        }), claim_etag(claim.id, claim.version))
     finally:
         db.close()
 
@@ -259,6 +358,11 @@ def list_claims():
         if status:
             query = query.filter(Claim.status == status)
 
+        etag = collection_etag(query)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
         claims = query.all()
         results = []
         for c in claims:
@@ -271,7 +375,7 @@ def list_claims():
                 "false_count": c.false_count,
             })
 
-        return jsonify(results)
+        return with_etag(jsonify(results), etag)
     finally:
         db.close()
 
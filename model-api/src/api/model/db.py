@@ -2,7 +2,7 @@ import datetime
 import uuid
 from datetime import datetime
 from sqlalchemy import (
-    create_engine, Column, String, Text, Integer, DateTime, ForeignKey, UniqueConstraint
+    create_engine, inspect, text, Column, String, Text, Integer, DateTime, ForeignKey, UniqueConstraint
 )
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
 DATABASE_URL = "sqlite:///claims.db"
@@ -42,7 +42,24 @@ class Claim(Base):
     explanation = Column(Text, nullable=True)
     truth_count = Column(Integer, default=0)
     false_count = Column(Integer, default=0)
+    version = Column(Integer, nullable=False, default=1, server_default="1")   # bumped on every visible change (ETags)
+    updated_at = Column(DateTime, default=datetime.utcnow)
     votes = relationship("FactCheckerVote", back_populates="claim")
 
+    def touch(self):
+        # SQL-side increment so concurrent writers can't both land on the same version
+        self.version = Claim.version + 1
+        self.updated_at = datetime.utcnow()
+
+def _migrate_claims():
+    """Add columns introduced after the table was first created (create_all never alters)."""
+    cols = {c["name"] for c in inspect(engine).get_columns("claims")}
+    with engine.begin() as conn:
+        if "version" not in cols:
+            conn.execute(text("ALTER TABLE claims ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+        if "updated_at" not in cols:
+            conn.execute(text("ALTER TABLE claims ADD COLUMN updated_at DATETIME"))
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    _migrate_claims()
\ No newline at end of file
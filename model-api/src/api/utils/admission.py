@@ -0,0 +1,269 @@
+# file: api/utils/admission.py
+"""
+Admission control for the LLM-backed endpoints.
+
+Two layers guard every judge call:
+  1. a per-client token bucket (fast 429 when a single client floods us)
+  2. a global in-flight limit with a bounded wait queue and deadline
+     (fast 503 when Gemini/Qdrant are saturated instead of piling up threads)
+
+All knobs come from the environment; a value of 0 disables that layer.
+"""
+from __future__ import annotations
+import os, math, time, asyncio, threading, functools, contextlib
+from typing import Dict, Any, Optional, Tuple
+
+from flask import request, jsonify
+
+MAX_INFLIGHT      = int(os.getenv("ADMISSION_MAX_INFLIGHT", "8"))
+MAX_QUEUE         = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT_S   = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+RATE_PER_MIN      = float(os.getenv("ADMISSION_RATE_PER_MIN", "30"))
+RATE_BURST        = int(os.getenv("ADMISSION_RATE_BURST", "10"))
+# reverse proxies in front of us that append to X-Forwarded-For; 0 trusts the header not at all
+TRUSTED_PROXIES   = int(os.getenv("TRUSTED_PROXIES", "0"))
+MAX_TRACKED_CLIENTS = 10_000
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/second, holds at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume one token. Returns 0.0 if admitted, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets keyed by client id (see client_address)."""
+
+    def __init__(self, per_min: float = RATE_PER_MIN, burst: int = RATE_BURST):
+        self.rate = per_min / 60.0
+        self.burst = max(1, burst)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str) -> float:
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                    # drop the least recently touched half; they would be full again anyway
+                    stale = sorted(self._buckets, key=lambda k: self._buckets[k].updated)
+                    for k in stale[: len(stale) // 2]:
+                        del self._buckets[k]
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            wait = bucket.take()
+            if wait > 0:
+                self.rejected += 1
+            return wait
+
+
+class InflightLimiter:
+    """
+    Global concurrency cap with a bounded FIFO-ish wait queue.
+    acquire() returns (admitted, reason) where reason is "queue_full" or "timeout" on rejection.
+    """
+
+    def __init__(self, max_inflight: int = MAX_INFLIGHT, max_queue: int = MAX_QUEUE,
+                 timeout_s: float = QUEUE_TIMEOUT_S):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_inflight > 0
+
+    def acquire(self) -> Tuple[bool, Optional[str]]:
+        if not self.enabled:
+            return True, None
+        with self._cond:
+            if self.in_flight < self.max_inflight and self.waiting == 0:
+                self.in_flight += 1
+                self.admitted += 1
+                return True, None
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                return False, "queue_full"
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.timeout_s
+            try:
+                while self.in_flight >= self.max_inflight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        return False, "timeout"
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                self.admitted += 1
+                return True, None
+            finally:
+                self.waiting -= 1
+
+    def release(self) -> None:
+        if not self.enabled:
+            return
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+
+class AsyncInflightLimiter(InflightLimiter):
+    """Same policy as InflightLimiter for the asyncio serving mode; waiters park on the event loop."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> Tuple[bool, Optional[str]]:
+        if not self.enabled:
+            return True, None
+        async with self._cond:
+            if self.in_flight < self.max_inflight and self.waiting == 0:
+                self.in_flight += 1
+                self.admitted += 1
+                return True, None
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                return False, "queue_full"
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self.in_flight < self.max_inflight),
+                    self.timeout_s,
+                )
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                return False, "timeout"
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            return True, None
+
+    async def release(self) -> None:
+        if not self.enabled:
+            return
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+
+rate_limiter = RateLimiter()
+inflight_limiter = InflightLimiter()
+async_inflight_limiter = AsyncInflightLimiter()
+
+
+def client_address(remote_addr: Optional[str], forwarded_for: Optional[str],
+                   trusted_proxies: int = TRUSTED_PROXIES) -> str:
+    """
+    Address to key a client on. X-Forwarded-For is client-controlled, so only the entry
+    appended by the outermost of `trusted_proxies` proxies is believed (as ProxyFix does);
+    with no trusted proxies, or a chain shorter than that, the socket peer is used.
+    """
+    if trusted_proxies > 0 and forwarded_for:
+        hops = [h.strip() for h in forwarded_for.split(",")]
+        if len(hops) >= trusted_proxies and hops[-trusted_proxies]:
+            return hops[-trusted_proxies]
+    return remote_addr or "unknown"
+
+
+def _client_id() -> str:
+    return client_address(request.remote_addr, request.headers.get("X-Forwarded-For"))
+
+
+def admission_stats(limiter: InflightLimiter = inflight_limiter) -> Dict[str, Any]:
+    return {
+        "in_flight": limiter.in_flight,
+        "queue_depth": limiter.waiting,
+        "max_inflight": limiter.max_inflight,
+        "max_queue": limiter.max_queue,
+        "queue_timeout_s": limiter.timeout_s,
+        "admitted": limiter.admitted,
+        "rejected_rate_limited": rate_limiter.rejected,
+        "rejected_queue_full": limiter.rejected_queue_full,
+        "rejected_timeout": limiter.rejected_timeout,
+    }
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@contextlib.contextmanager
+def judge_slot():
+    """
+    Hold one global in-flight slot for the duration of a judge call.
+    Raises AdmissionRejected if the wait queue is full or the deadline passes.
+    """
+    admitted, reason = inflight_limiter.acquire()
+    if not admitted:
+        raise AdmissionRejected(reason, inflight_limiter.timeout_s / 2)
+    try:
+        yield
+    finally:
+        inflight_limiter.release()
+
+
+@contextlib.asynccontextmanager
+async def async_judge_slot():
+    """Async counterpart of judge_slot() backed by async_inflight_limiter."""
+    admitted, reason = await async_inflight_limiter.acquire()
+    if not admitted:
+        raise AdmissionRejected(reason, async_inflight_limiter.timeout_s / 2)
+    try:
+        yield
+    finally:
+        await async_inflight_limiter.release()
+
+
+def require_admission(func):
+    """
+    Route decorator: rate-limit the caller and turn AdmissionRejected raised by
+    judge_slot() inside the route into an immediate 503.
+    Rejections carry a Retry-After header.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        wait = rate_limiter.check(_client_id())
+        if wait > 0:
+            resp = jsonify(error="rate limit exceeded, slow down")
+            resp.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+            return resp, 429
+        try:
+            return func(*args, **kwargs)
+        except AdmissionRejected as e:
+            resp = jsonify(error="server busy, try again later", reason=e.reason)
+            resp.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after)))
+            return resp, 503
+    return wrapper
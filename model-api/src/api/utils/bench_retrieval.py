@@ -0,0 +1,101 @@
+# file: api/utils/bench_retrieval.py
+"""
+Offline recall benchmark: dense vs lexical vs hybrid (RRF) retrieval on the seeded claims.
+
+    python -m api.utils.bench_retrieval              # needs Qdrant up with the ingested collection
+    python -m api.utils.bench_retrieval --lexical-only
+
+Each seeded claim that names one product/measure/year is labelled with the fact record
+that settles it; recall@k is the share of claims whose record is in the top k. Also reports
+the per-query cost of the lexical side alone. Lexical ties rank in record (CSV) order, so
+repeated runs over the same records report the same recall.
+"""
+from __future__ import annotations
+import copy, time, argparse
+from typing import Callable, Dict, List, Tuple
+
+from api.utils.lexical import LexicalIndex, build_records_from_csv
+
+WMP, BUTTER, SMP = "Whole milk powder", "Butter, AMF, and cream", "Skim milk & butter milk powder"
+CASEIN, CHEESE = "Casein & protein products", "Cheese"
+VOLUME, PRICE, REVENUE = "Export volume", "Average export price", "Export revenue"
+
+# (claim, product, measure, year) — claims from init_claims.seed_claims; the two that compare
+# across categories ("90% of all dairy exports", "the largest among dairy categories") have no
+# single settling record and are left out.
+LABELLED_CLAIMS: List[Tuple[str, str, str, int]] = [
+    ("In 2012, New Zealand exported 1,123,294 tonnes of whole milk powder.", WMP, VOLUME, 2012),
+    ("In 2014, export revenue from cheese was 5,575 million $NZ.", CHEESE, REVENUE, 2014),
+    ("Average export price for butter in 2013 was 3,500 $NZ/tonne.", BUTTER, PRICE, 2013),
+    ("New Zealand exported over 1 million tonnes of whole milk powder in 2013.", WMP, VOLUME, 2013),
+    ("Casein export revenue in 2012 exceeded 1,000 million $NZ.", CASEIN, REVENUE, 2012),
+    ("In 2015, cheese exports from New Zealand exceeded 5 million tonnes.", CHEESE, VOLUME, 2015),
+    ("New Zealand exported 10 million tonnes of butter in 2014.", BUTTER, VOLUME, 2014),
+    ("Skim milk powder exports in 2013 were less than 100 tonnes.", SMP, VOLUME, 2013),
+    ("Export revenue from casein in 2014 was 50 million $NZ.", CASEIN, REVENUE, 2014),
+    ("New Zealand exported 750,000 tonnes of skim milk powder in 2014.", SMP, VOLUME, 2014),
+    ("Average export price of cheese in 2013 was exactly 4,000 $NZ/tonne.", CHEESE, PRICE, 2013),
+    ("Export revenue from whole milk powder in 2015 was 8,000 million $NZ.", WMP, REVENUE, 2015),
+    ("In 2014, butter exports reached exactly 500,000 tonnes.", BUTTER, VOLUME, 2014),
+]
+
+KS = (1, 3, 5)
+
+SearchFn = Callable[[str, int], List[Dict]]
+
+
+def _is_relevant(payload: Dict, product: str, measure: str, year: int) -> bool:
+    return (payload.get("product") == product and payload.get("measure") == measure
+            and int(payload.get("year", -1)) == year)
+
+
+def recall_at_k(search: SearchFn) -> Dict[str, float]:
+    found = {k: 0 for k in KS}
+    for claim, product, measure, year in LABELLED_CLAIMS:
+        payloads = search(claim, max(KS))
+        for k in KS:
+            if any(_is_relevant(p, product, measure, year) for p in payloads[:k]):
+                found[k] += 1
+    return {f"recall@{k}": round(found[k] / len(LABELLED_CLAIMS), 3) for k in KS}
+
+
+def lexical_cost_us(index: LexicalIndex, rounds: int = 200) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for claim, *_ in LABELLED_CLAIMS:
+            index.search(claim, limit=20)
+    return (time.perf_counter() - t0) / (rounds * len(LABELLED_CLAIMS)) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default=None, help="build the lexical index from this CSV instead of the ingest records")
+    ap.add_argument("--lexical-only", action="store_true", help="skip the modes that need Qdrant")
+    args = ap.parse_args()
+
+    index = LexicalIndex(build_records_from_csv(args.csv)) if args.csv else LexicalIndex.load()
+    if index is None:
+        from api.utils.ingest import CSV_FILE_PATH
+        index = LexicalIndex(build_records_from_csv(CSV_FILE_PATH))
+    print(f"lexical index: {len(index)} records, {len(index.postings)} terms")
+
+    modes: Dict[str, SearchFn] = {
+        "lexical": lambda q, k: [doc["payload"] for _, doc in index.search(q, limit=k)],
+    }
+    if not args.lexical_only:
+        from api.utils.retrieve import Retriever
+        dense = Retriever(hybrid=False)
+        hybrid = copy.copy(dense)   # shares the embedding model and Qdrant client
+        hybrid.lexical = index
+        modes["dense"] = lambda q, k: [h.payload for h in dense.search(q, top_k=k)]
+        modes["hybrid"] = lambda q, k: [h.payload for h in hybrid.search(q, top_k=k)]
+
+    print(f"{'mode':<8} " + " ".join(f"{'recall@' + str(k):>9}" for k in KS))
+    for name, search in modes.items():
+        r = recall_at_k(search)
+        print(f"{name:<8} " + " ".join(f"{r[f'recall@{k}']:>9.3f}" for k in KS))
+    print(f"lexical side: {lexical_cost_us(index):.1f} µs/query")
+
+
+if __name__ == "__main__":
+    main()
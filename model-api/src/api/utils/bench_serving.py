@@ -0,0 +1,123 @@
+# file: api/utils/bench_serving.py
+"""
+Compare the sync (Flask) and async (ASGI) serving modes under concurrent claim checks.
+
+    # both servers: export ADMISSION_RATE_PER_MIN=0 ADMISSION_MAX_INFLIGHT=256 ADMISSION_MAX_QUEUE=1024
+    # terminal 1: python -m api.controller                         (sync, :8080)
+    # terminal 2: uvicorn api.asgi:app --port 8081                 (async, :8081)
+    python -m api.utils.bench_serving --sync http://localhost:8080 --async http://localhost:8081 -c 128 -n 1000
+
+Each mode gets the same request mix; reported: throughput, latency percentiles, status counts.
+Pass --distinct to defeat single-flight coalescing and measure raw serving capacity.
+
+All requests come from one client, so with the default admission limits (30/min per client,
+8 in flight) both modes would mostly measure 429/503s. Start both servers with the limits
+above; if fewer than MIN_OK_RATIO of a mode's requests succeed, no speedup is reported.
+"""
+from __future__ import annotations
+import json, time, argparse, urllib.request, urllib.error
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+SAMPLE_CLAIMS = [
+    "In 2012, New Zealand exported 1,123,294 tonnes of whole milk powder.",
+    "In 2014, export revenue from cheese was 5,575 million $NZ.",
+    "Average export price for butter in 2013 was 3,500 $NZ/tonne.",
+    "New Zealand exported 10 million tonnes of butter in 2014.",
+    "Skim milk powder exports in 2013 were less than 100 tonnes.",
+    "Export revenue from casein in 2014 was 50 million $NZ.",
+]
+
+MIN_OK_RATIO = 0.9
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * p / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def request_json(method: str, url: str, body: Optional[Dict], timeout: float,
+                 headers: Optional[Dict[str, str]] = None) -> Tuple[int, float, Optional[Dict]]:
+    """Send a JSON request; returns (status, latency_s, parsed_body or None). Status 0 = transport error."""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={"Content-Type": "application/json", **(headers or {})})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            payload = resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        payload, status = e.read(), e.code
+    except (urllib.error.URLError, TimeoutError, ConnectionError):
+        return 0, time.perf_counter() - t0, None
+    latency = time.perf_counter() - t0
+    try:
+        return status, latency, json.loads(payload)
+    except ValueError:
+        return status, latency, None
+
+
+def run_mode(base_url: str, route: str, total: int, concurrency: int, distinct: bool, timeout: float) -> Dict:
+    bodies = []
+    for i in range(total):
+        claim = SAMPLE_CLAIMS[i % len(SAMPLE_CLAIMS)]
+        if distinct:
+            claim = f"{claim} (bench {i})"
+        bodies.append({"claim": claim})
+
+    url = base_url.rstrip("/") + route
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda b: request_json("POST", url, b, timeout), bodies))
+    wall = time.perf_counter() - t0
+
+    lat = sorted(r[1] for r in results if r[0] == 200)
+    return {
+        "requests": total,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(lat) / wall, 2) if wall > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 1),
+        "p95_ms": round(percentile(lat, 95) * 1000, 1),
+        "p99_ms": round(percentile(lat, 99) * 1000, 1),
+        "ok_ratio": round(len(lat) / total, 3) if total else 0.0,
+        "status": dict(Counter(r[0] for r in results)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sync", dest="sync_url", default="http://localhost:8080")
+    ap.add_argument("--async", dest="async_url", default="http://localhost:8081")
+    ap.add_argument("--route", default="/check-claim")
+    ap.add_argument("-n", "--requests", type=int, default=200)
+    ap.add_argument("-c", "--concurrency", type=int, default=32)
+    ap.add_argument("--distinct", action="store_true", help="make every claim unique")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args()
+
+    report = {}
+    for mode, url in (("sync", args.sync_url), ("async", args.async_url)):
+        if not url:
+            continue
+        print(f"→ {mode}: {url}{args.route}  n={args.requests} c={args.concurrency}")
+        report[mode] = run_mode(url, args.route, args.requests, args.concurrency, args.distinct, args.timeout)
+        print(json.dumps(report[mode], indent=2))
+
+    rejected = [m for m, r in report.items() if r["ok_ratio"] < MIN_OK_RATIO]
+    if rejected:
+        print(f"! {', '.join(rejected)}: only {min(report[m]['ok_ratio'] for m in rejected):.0%} of requests "
+              f"returned 200 (429 = rate limited, 503 = admission queue); this measures admission control, "
+              f"not serving. Restart with ADMISSION_RATE_PER_MIN=0 and a higher ADMISSION_MAX_INFLIGHT. "
+              f"No speedup reported.")
+    elif "sync" in report and "async" in report and report["sync"]["throughput_rps"]:
+        speedup = report["async"]["throughput_rps"] / report["sync"]["throughput_rps"]
+        print(f"async/sync throughput: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
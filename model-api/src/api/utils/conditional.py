@@ -0,0 +1,52 @@
+# file: api/utils/conditional.py
+"""
+ETag / If-None-Match support for the claim read endpoints.
+
+ETags are derived from Claim.version (bumped on judge results and votes), so a poll
+that matches costs one indexed/aggregate query and returns 304 without loading rows or
+serializing a body. Responses carry `Cache-Control: no-cache`, which makes browsers
+revalidate every time and transparently turn a 304 back into the cached JSON.
+"""
+from __future__ import annotations
+import hashlib
+from typing import Optional
+
+from flask import request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+from api.model.db import Claim
+
+
+def claim_etag(claim_id: str, version: int) -> str:
+    return f'"claim-{claim_id}-v{version}"'
+
+
+def collection_etag(query: Query) -> str:
+    """
+    ETag for a filtered set of claims: any insert, delete or version bump changes
+    count/sum(version)/max(updated_at). `query` must select from Claim with its filters applied.
+    """
+    count, version_sum, last_update = (
+        query.with_entities(
+            func.count(Claim.id), func.coalesce(func.sum(Claim.version), 0), func.max(Claim.updated_at)
+        )
+        .order_by(None)
+        .one()
+    )
+    key = f"{request.full_path}|{count}|{version_sum}|{last_update}"
+    return '"claims-' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """Return a bodyless 304 if the client already holds `etag`, else None."""
+    if request.if_none_match and request.if_none_match.contains_weak(etag.strip('"')):
+        resp = Response(status=304)
+        return with_etag(resp, etag)
+    return None
+
+
+def with_etag(resp: Response, etag: str) -> Response:
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
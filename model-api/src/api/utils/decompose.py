@@ -0,0 +1,95 @@
+# file: api/utils/decompose.py
+"""
+Split compound claims into atomic sub-claims.
+
+"In 2014 butter exports hit 500,000 tonnes and cheese revenue was 5,575 million"
+  -> ["In 2014 butter exports hit 500,000 tonnes",
+      "In 2014, cheese revenue was 5,575 million"]
+
+Rule-based on purpose: it runs on every request, so it must cost microseconds rather than
+another LLM round trip. A clause only becomes its own sub-claim if it carries a number
+(the facts our dataset can check) and has a subject of its own: at least two content words
+ahead of its first non-year number. Anything else stays attached to its neighbour, so
+"butter and cheese", "between 2012 and 2014" and "1,000 and 2,000 million" are never split.
+Parts that lack a year inherit the nearest one stated in the claim.
+"""
+from __future__ import annotations
+import re
+from typing import Dict, List
+
+MAX_PARTS = 6
+
+_SEPARATORS = re.compile(r"(\s*;\s*|,?\s+(?:and|while|whereas|but)\s+)", re.IGNORECASE)
+_DIGIT = re.compile(r"\d")
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_NUMBER = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?")
+_WORD = re.compile(r"[A-Za-z]+")
+# the "and" that closes "between X and Y" joins one fact; it is masked before splitting
+_RANGE_AND = re.compile(r"(\bbetween\s+[^;]*?\s)(and)(?=\s)", re.IGNORECASE)
+_MASK = "\x00"
+# words that cannot carry a clause's subject on their own
+_FUNCTION_WORDS = {
+    "a", "an", "the", "in", "on", "at", "of", "by", "to", "for", "from", "between", "than",
+    "is", "are", "was", "were", "be", "been", "it", "this", "that", "there",
+    "over", "under", "about", "around", "nearly", "almost", "exactly", "more", "less", "only", "just",
+}
+MIN_SUBJECT_WORDS = 2
+
+
+def _has_subject(clause: str) -> bool:
+    """True if `clause` has MIN_SUBJECT_WORDS content words before its first non-year number."""
+    end = len(clause)
+    for m in _NUMBER.finditer(clause):
+        if not _YEAR.fullmatch(m.group(0)):
+            end = m.start()
+            break
+    words = [w for w in _WORD.findall(clause[:end]) if w.lower() not in _FUNCTION_WORDS]
+    return len(words) >= MIN_SUBJECT_WORDS
+
+
+def decompose_claim(claim: str) -> List[str]:
+    """Return the atomic sub-claims of `claim`; a simple claim comes back as [claim]."""
+    text = _RANGE_AND.sub(lambda m: m.group(1) + _MASK + m.group(2), claim.strip().rstrip("."))
+    pieces = _SEPARATORS.split(text)
+    # pieces alternates clause, separator, clause, ...
+    clauses, seps = pieces[0::2], pieces[1::2]
+
+    parts: List[str] = []
+    pending = ""   # leading text with no claim of its own, waiting to be attached forward
+    for i, clause in enumerate(clauses):
+        clause = clause.strip(" ,").replace(_MASK, "")
+        if not clause:
+            continue
+        if _DIGIT.search(clause) and _has_subject(clause):
+            parts.append(pending + clause)
+            pending = ""
+        elif parts:
+            parts[-1] = parts[-1] + seps[i - 1] + clause
+        else:
+            pending = pending + clause + (seps[i] if i < len(seps) else " ")
+
+    if pending:
+        parts.append(pending.strip())
+    if len(parts) <= 1 or len(parts) > MAX_PARTS:
+        return [claim.strip()]
+
+    # a part without a year inherits the nearest one stated before it (or, failing that, after it)
+    years = [m.group(0) if (m := _YEAR.search(p)) else None for p in parts]
+    out = []
+    for i, p in enumerate(parts):
+        if years[i]:
+            out.append(p)
+            continue
+        year = next((y for y in reversed(years[:i]) if y), None) or next((y for y in years[i + 1:] if y), None)
+        out.append(f"In {year}, {p}" if year else p)
+    return out
+
+
+def aggregate_verdicts(parts: List[Dict]) -> str:
+    """Overall verdict: any FALSE part makes the claim FALSE; TRUE only if every part is TRUE."""
+    results = [p.get("result") for p in parts]
+    if "FALSE" in results:
+        return "FALSE"
+    if results and all(r == "TRUE" for r in results):
+        return "TRUE"
+    return "NOT ENOUGH EVIDENCE"
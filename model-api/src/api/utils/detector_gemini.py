@@ -1,10 +1,14 @@
 # file: model/gemini_judge.py
 from __future__ import annotations
-import os, json
-from typing import Dict, Any, Optional
+import os, json, time, asyncio, threading, contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
 
 import google.generativeai as genai
-from api.utils.retrieve import Retriever   # <-- your retriever class
+from api.utils.admission import AdmissionRejected, QUEUE_TIMEOUT_S
+from api.utils.decompose import aggregate_verdicts, decompose_claim
+from api.utils.profiler import profiler
+from api.utils.retrieve import AsyncCachedRetriever, AsyncRetriever, CachedRetriever, Retriever   # <-- your retriever class
 
 _SYSTEM = (
     "You are a strict fact checker. Decide TRUE, FALSE, or NOT ENOUGH EVIDENCE "
@@ -13,6 +17,22 @@ _SYSTEM = (
     'Return ONLY this JSON: {"result":"TRUE|FALSE|NOT ENOUGH EVIDENCE","explanation":"one short sentence"}'
 )
 
+DECOMPOSE_CLAIMS  = os.getenv("CLAIM_DECOMPOSE", "1") != "0"
+SUBCLAIM_WORKERS  = int(os.getenv("SUBCLAIM_WORKERS", "4"))
+
+# a sub-claim must reach a pool worker within the admission queue deadline, like any judge call
+SUBCLAIM_QUEUE_TIMEOUT_S = QUEUE_TIMEOUT_S
+
+# shared across requests: sub-claims of one compound claim are checked concurrently here
+_subclaim_pool = ThreadPoolExecutor(max_workers=SUBCLAIM_WORKERS, thread_name_prefix="subclaim")
+_subclaim_lock = threading.Lock()
+_subclaim_queued = 0
+_subclaim_rejected = 0
+
+def subclaim_stats() -> Dict[str, Any]:
+    with _subclaim_lock:
+        return {"workers": SUBCLAIM_WORKERS, "queued": _subclaim_queued, "rejected_timeout": _subclaim_rejected}
+
 def _ensure_gemini(model_name: str, api_key: Optional[str]) -> genai.GenerativeModel:
     key = api_key or os.getenv("GOOGLE_API_KEY")
     if not key:
@@ -20,50 +40,194 @@ def _ensure_gemini(model_name: str, api_key: Optional[str]) -> genai.GenerativeM
     genai.configure(api_key=key)
     return genai.GenerativeModel(model_name)
 
+def _build_prompt(claim: str, evidences: List[str]) -> str:
+    ev_block = "\n".join(f"- {e}" for e in evidences) if evidences else "- (no evidence found)"
+    return f"{_SYSTEM}\n\nClaim:\n{claim}\n\nEvidence:\n{ev_block}\n"
+
+def _parse_response(raw: str, evidences: List[str]) -> Dict[str, Any]:
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError:
+        start, end = raw.find("{"), raw.rfind("}")
+        parsed = json.loads(raw[start:end+1]) if (start >= 0 and end > start) else {
+            "result": "NOT ENOUGH EVIDENCE",
+            "explanation": "Could not parse model response."
+        }
+
+    parsed.setdefault("result", "NOT ENOUGH EVIDENCE")
+    parsed.setdefault("explanation", "No explanation provided.")
+    parsed["evidence"] = evidences
+    parsed["raw"] = raw
+    return parsed
+
+_retriever: Optional[Retriever] = None
+_retriever_lock = threading.Lock()
+
+def _get_retriever() -> Retriever:
+    # one shared instance per process: the embedding model is expensive to load
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = Retriever()
+    return _retriever
+
+def _combine_parts(parts: List[str], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    details = [
+        {"claim": c, "result": r["result"], "explanation": r["explanation"], "evidence": r["evidence"]}
+        for c, r in zip(parts, results)
+    ]
+    evidences = list(dict.fromkeys(e for r in results for e in r["evidence"]))
+    return {
+        "result": aggregate_verdicts(details),
+        "explanation": " | ".join(f'{d["claim"]}: {d["result"]} ({d["explanation"]})' for d in details),
+        "evidence": evidences,
+        "raw": "\n".join(r["raw"] for r in results),
+        "parts": details,
+    }
+
+def _judge_single(claim: str, retriever, model: genai.GenerativeModel,
+                  generation_config: Dict[str, Any], top_k: int,
+                  slot: Callable[[], Any] = contextlib.nullcontext) -> Dict[str, Any]:
+    with slot():
+        # Step 1: Retrieve evidence from Qdrant
+        hits = retriever.search(claim, top_k=top_k)
+        evidences = [h.payload["fact_text"] for h in hits]
+
+        # Step 2: Prepare prompt
+        prompt = _build_prompt(claim, evidences)
+
+        # Step 3: Call Gemini
+        resp = model.generate_content(prompt, generation_config=generation_config)
+        raw = getattr(resp, "text", "") or ""
+
+    # Step 4: Robust JSON parse
+    return _parse_response(raw, evidences)
+
 def judge_claim_with_gemini(
     claim: str,
     *,
     model_name: str = "gemini-1.5-flash",
     temperature: float = 0.0,
     api_key: Optional[str] = None,
-    top_k: int = 5
+    top_k: int = 5,
+    decompose: bool = DECOMPOSE_CLAIMS,
+    slot: Callable[[], Any] = contextlib.nullcontext
 ) -> Dict[str, Any]:
     """
     Given a claim, retrieves evidence from Qdrant and asks Gemini to fact-check it.
+    Compound claims are split into atomic sub-claims that are checked concurrently and
+    aggregated; the result then also carries "parts" with the per-sub-claim verdicts.
+    `slot` is entered around every retrieval + Gemini call (e.g. admission.judge_slot),
+    so a compound claim is charged once per sub-claim.
     Returns: {"result": "TRUE|FALSE|NOT ENOUGH EVIDENCE", "explanation": "...", "evidence": [...], "raw": "..."}
     """
+    retriever = _get_retriever()
+    model = _ensure_gemini(model_name, api_key)
+    generation_config = {
+        "temperature": temperature,
+        "response_mime_type": "application/json",
+    }
 
-    # Step 1: Retrieve evidence from Qdrant
-    retriever = Retriever()
-    hits = retriever.search(claim, top_k=top_k)
-    evidences = [h.payload["fact_text"] for h in hits]
+    parts = decompose_claim(claim) if decompose else [claim]
+    if len(parts) == 1:
+        return _judge_single(claim, retriever, model, generation_config, top_k, slot)
 
-    # Step 2: Prepare prompt
-    ev_block = "\n".join(f"- {e}" for e in evidences) if evidences else "- (no evidence found)"
-    prompt = f"{_SYSTEM}\n\nClaim:\n{claim}\n\nEvidence:\n{ev_block}\n"
+    global _subclaim_queued, _subclaim_rejected
+    cached = CachedRetriever(retriever)
+    deadline = time.monotonic() + SUBCLAIM_QUEUE_TIMEOUT_S
+    started = threading.Semaphore(0)
+    route = profiler.active_route()   # keep sampling a profiled request on the pool threads
+
+    def run_part(part: str) -> Dict[str, Any]:
+        global _subclaim_queued
+        with _subclaim_lock:
+            _subclaim_queued -= 1
+        if time.monotonic() > deadline:
+            raise AdmissionRejected("timeout", SUBCLAIM_QUEUE_TIMEOUT_S / 2)
+        started.release()
+        with profiler.attach(route):
+            return _judge_single(part, cached, model, generation_config, top_k, slot)
+
+    with _subclaim_lock:
+        _subclaim_queued += len(parts)
+    futures = [_subclaim_pool.submit(run_part, p) for p in parts]
+    try:
+        # the pool queue is unbounded: give up once a part has not reached a worker by the deadline
+        for _ in parts:
+            if not started.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                with _subclaim_lock:
+                    _subclaim_rejected += 1
+                raise AdmissionRejected("timeout", SUBCLAIM_QUEUE_TIMEOUT_S / 2)
+        results = [f.result() for f in futures]
+    except BaseException:
+        # one part was rejected or failed: don't spend Gemini calls on the rest
+        for f in futures:
+            if f.cancel():
+                with _subclaim_lock:
+                    _subclaim_queued -= 1
+        raise
+    return _combine_parts(parts, results)
+
+_async_retriever: Optional[AsyncRetriever] = None
+
+def _get_async_retriever() -> AsyncRetriever:
+    global _async_retriever
+    if _async_retriever is None:
+        _async_retriever = AsyncRetriever()
+    return _async_retriever
+
+async def _judge_single_async(claim: str, retriever, model: genai.GenerativeModel,
+                              generation_config: Dict[str, Any], top_k: int,
+                              slot: Callable[[], Any] = contextlib.nullcontext) -> Dict[str, Any]:
+    async with slot():
+        hits = await retriever.search(claim, top_k=top_k)
+        evidences = [h.payload["fact_text"] for h in hits]
+
+        prompt = _build_prompt(claim, evidences)
+
+        resp = await model.generate_content_async(prompt, generation_config=generation_config)
+        raw = getattr(resp, "text", "") or ""
 
-    # Step 3: Call Gemini
+    return _parse_response(raw, evidences)
+
+async def judge_claim_with_gemini_async(
+    claim: str,
+    *,
+    model_name: str = "gemini-1.5-flash",
+    temperature: float = 0.0,
+    api_key: Optional[str] = None,
+    top_k: int = 5,
+    decompose: bool = DECOMPOSE_CLAIMS,
+    slot: Callable[[], Any] = contextlib.nullcontext
+) -> Dict[str, Any]:
+    """
+    Async variant of judge_claim_with_gemini for the ASGI serving mode.
+    Qdrant and Gemini I/O are awaited; embedding runs in the default executor.
+    `slot` is an async context manager factory (e.g. admission.async_judge_slot).
+    """
+    retriever = _get_async_retriever()
     model = _ensure_gemini(model_name, api_key)
     generation_config = {
         "temperature": temperature,
         "response_mime_type": "application/json",
     }
 
-    resp = model.generate_content(prompt, generation_config=generation_config)
-    raw = getattr(resp, "text", "") or ""
+    parts = decompose_claim(claim) if decompose else [claim]
+    if len(parts) == 1:
+        return await _judge_single_async(claim, retriever, model, generation_config, top_k, slot)
 
-    # Step 4: Robust JSON parse
-    try:
-        parsed = json.loads(raw)
-    except json.JSONDecodeError:
-        start, end = raw.find("{"), raw.rfind("}")
-        parsed = json.loads(raw[start:end+1]) if (start >= 0 and end > start) else {
-            "result": "NOT ENOUGH EVIDENCE",
-            "explanation": "Could not parse model response."
-        }
+    cached = AsyncCachedRetriever(retriever)
+    limit = asyncio.Semaphore(SUBCLAIM_WORKERS)
 
-    parsed.setdefault("result", "NOT ENOUGH EVIDENCE")
-    parsed.setdefault("explanation", "No explanation provided.")
-    parsed["evidence"] = evidences
-    parsed["raw"] = raw
-    return parsed
+    async def bounded(part: str) -> Dict[str, Any]:
+        async with limit:
+            return await _judge_single_async(part, cached, model, generation_config, top_k, slot)
+
+    tasks = [asyncio.ensure_future(bounded(p)) for p in parts]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        raise
+    return _combine_parts(parts, list(results))
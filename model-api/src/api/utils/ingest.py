@@ -10,6 +10,14 @@ from qdrant_client.models import (
 )
 import hashlib
 
+try:
+    from api.utils.lexical import LEXICAL_INDEX_PATH, save_records
+except ModuleNotFoundError as e:
+    if e.name != "api":
+        raise
+    # run directly as a script from this directory
+    from lexical import LEXICAL_INDEX_PATH, save_records
+
 CSV_FILE_PATH = 'data/sopi-2004-2024.csv'
 COLLECTION = 'dairy_exports'
 EMBED_MODEL = "BAAI/bge-small-en-v1.5"
@@ -63,6 +71,21 @@ def deterministic_id(payload: Dict) -> str:
     key = f'{payload.get('product')}|{payload.get('measure')}|{payload.get('units')}|{payload.get('year')}|{payload.get('amount_raw')}'
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, key))
 
+def build_payload(row) -> Dict:
+    return {
+        "product": row["Product"],
+        "measure": row["Measure"],
+        "units": row["Units"],
+        "year": int(row["Year"]),
+        "value": row["Value"],
+        "amount": row["Value"],
+        "fact_text": row["fact_text"],
+        "tenant": "acme",
+        "domain": "dairy_exports",
+        "source": "csv",
+        "mime_type": "text/csv",
+    }
+
 def main():
     # 1) Prepare data
     long_df = load_and_transform(CSV_FILE_PATH)
@@ -86,21 +109,13 @@ def main():
     points: List[PointStruct] = []
     BATCH = 256
 
+    # records for the in-process lexical index (see api.utils.lexical)
+    records: List[Dict] = []
+
     for i, row in long_df.iterrows():
-        payload = {
-            "product": row["Product"],
-            "measure": row["Measure"],
-            "units": row["Units"],
-            "year": int(row["Year"]),
-            "value": row["Value"],
-            "amount": row["Value"],
-            "fact_text": row["fact_text"],
-            "tenant": "acme",
-            "domain": "dairy_exports",
-            "source": "csv",
-            "mime_type": "text/csv",
-        }
+        payload = build_payload(row)
         pid = deterministic_id(payload)
+        records.append({"id": pid, "payload": payload})
         vec = model.encode(row["fact_text"]).tolist()
         points.append(PointStruct(id=pid, vector=vec, payload=payload))
 
@@ -114,5 +129,9 @@ def main():
     count = client.count(COLLECTION).count
     print(f"Collection '{COLLECTION}' now has {count} points.")
 
+    # 5) Lexical index records (years / numbers / product terms) fused with dense hits at query time
+    save_records(records, LEXICAL_INDEX_PATH)
+    print(f"Lexical index: {len(records)} records -> {LEXICAL_INDEX_PATH}")
+
 if __name__ == "__main__":
     main()
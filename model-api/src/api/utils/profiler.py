@@ -0,0 +1,202 @@
+# file: api/utils/profiler.py
+"""
+On-demand sampling profiler for live requests.
+
+Opt-in and off by default: nothing is sampled unless PROFILER_TOKEN is set and either
+  * a request carries `X-Profile: <PROFILER_TOKEN>` (profiles just that request), or
+  * an admin enabled a window via POST /admin/profiler {"sample_rate": 0.1, "duration_s": 60}
+    (profiles that fraction of requests until the window closes).
+
+While at least one profiled request is running, a daemon thread snapshots the stacks of
+the threads serving them every PROFILER_INTERVAL_MS and aggregates them as collapsed stacks
+(`route;frame;frame;... count`), downloadable from GET /admin/profiler/collapsed and ready
+for flamegraph.pl or speedscope. With no profiled request in flight the sampler sleeps, so the
+only cost on the request path is one header lookup.
+
+Covers the Flask (WSGI) routes; in the ASGI mode that is every route except the native async ones.
+Work a profiled request hands to a pool (sub-claims of a compound claim) is sampled under the
+same route via profiler.attach().
+"""
+from __future__ import annotations
+import os, sys, time, hmac, random, threading, functools, contextlib
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from flask import request, jsonify, g
+
+PROFILER_TOKEN       = os.getenv("PROFILER_TOKEN", "")
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+MAX_STACKS           = 50_000
+MAX_DEPTH            = 128
+PROFILE_HEADER       = "X-Profile"
+TOKEN_HEADER         = "X-Profiler-Token"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, token: str = PROFILER_TOKEN, interval_s: float = PROFILER_INTERVAL_MS / 1000.0):
+        self.token = token
+        self.interval_s = interval_s
+        self.sample_rate = 0.0
+        self.window_until = 0.0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.profiled_requests = 0
+        self._active: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def authorized(self, presented: Optional[str]) -> bool:
+        # compare bytes: compare_digest raises TypeError on non-ASCII str
+        return (self.enabled and bool(presented)
+                and hmac.compare_digest(presented.encode("utf-8"), self.token.encode("utf-8")))
+
+    def window_open(self) -> bool:
+        return self.sample_rate > 0 and time.monotonic() < self.window_until
+
+    def should_profile(self, header_value: Optional[str]) -> bool:
+        if header_value is not None:
+            return self.authorized(header_value)
+        return self.window_open() and random.random() < self.sample_rate
+
+    def start_window(self, sample_rate: float, duration_s: float) -> None:
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.window_until = time.monotonic() + max(0.0, duration_s)
+
+    def stop_window(self) -> None:
+        self.sample_rate = 0.0
+        self.window_until = 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self.profiled_requests = 0
+
+    def begin(self, route: str, *, new_request: bool = True) -> None:
+        with self._lock:
+            self._active[threading.get_ident()] = route.replace(";", ":")
+            if new_request:
+                self.profiled_requests += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self) -> None:
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def active_route(self) -> Optional[str]:
+        """Route label if the calling thread is being profiled, else None."""
+        with self._lock:
+            return self._active.get(threading.get_ident())
+
+    @contextlib.contextmanager
+    def attach(self, route: Optional[str]):
+        """Sample the calling (worker) thread under `route` while it does work for a profiled request."""
+        if route is None:
+            yield
+            return
+        self.begin(route, new_request=False)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._wake.clear()
+            if not active:
+                self._wake.wait()
+                continue
+
+            frames = sys._current_frames()
+            collected = []
+            for tid, route in active.items():
+                frame = frames.get(tid)
+                if frame is None or tid == me:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(route)
+                collected.append(";".join(reversed(labels)))
+            del frames
+
+            with self._lock:
+                for key in collected:
+                    if key not in self.stacks and len(self.stacks) >= MAX_STACKS:
+                        key = "[truncated]"
+                    self.stacks[key] += 1
+                    self.samples += 1
+            time.sleep(self.interval_s)
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "window_open": self.window_open(),
+                "sample_rate": self.sample_rate if self.window_open() else 0.0,
+                "window_remaining_s": round(max(0.0, self.window_until - time.monotonic()), 1),
+                "interval_ms": self.interval_s * 1000,
+                "in_flight_profiled": len(self._active),
+                "profiled_requests": self.profiled_requests,
+                "samples": self.samples,
+                "distinct_stacks": len(self.stacks),
+            }
+
+
+profiler = SamplingProfiler()
+
+
+def install_profiler(app) -> None:
+    """Register Flask hooks that attach the sampler to selected requests."""
+    if not profiler.enabled:
+        return
+
+    @app.before_request
+    def _profiler_begin():
+        if request.path.startswith("/admin/profiler"):
+            return
+        if not profiler.should_profile(request.headers.get(PROFILE_HEADER)):
+            return
+        rule = request.url_rule.rule if request.url_rule else request.path
+        profiler.begin(f"{request.method} {rule}")
+        g._profiled = True
+
+    @app.teardown_request
+    def _profiler_end(exc):
+        if g.pop("_profiled", False):
+            profiler.end()
+
+
+def require_profiler_token(func):
+    """Admin-endpoint guard: 404 when profiling is not configured, 401 on a bad token."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return jsonify(error="Not found"), 404
+        if not profiler.authorized(request.headers.get(TOKEN_HEADER)):
+            return jsonify(error="Missing/invalid profiler token"), 401
+        return func(*args, **kwargs)
+    return wrapper
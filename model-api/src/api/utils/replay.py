@@ -0,0 +1,197 @@
+# file: api/utils/replay.py
+"""
+Replay a captured request log (see api.utils.request_log) against a local instance.
+
+    python -m api.utils.replay requests.jsonl --base http://localhost:8080 --speed 1      # original pacing
+    python -m api.utils.replay requests.jsonl --speed 4 -c 64                              # 4x faster
+    python -m api.utils.replay requests.jsonl --speed max -c 128 --route /check-claim     # as fast as possible
+
+Reports latency percentiles of successful replies (overall and per route) next to those of
+each status class, status codes, how far the replay fell behind schedule, and verdicts that
+differ from the ones recorded in the log.
+
+The log's clients all replay from this one host and so share one rate-limit bucket: start
+the target with ADMISSION_RATE_PER_MIN=0, or most of a realistic log turns into 429s (the
+report warns when more than TOO_MANY_429 of the replies are 429).
+Requests that needed a bearer token are only replayed when --token is given; requests
+whose URL or body carries an anonymized value, or whose body lost a field to scrubbing
+(a sign-in without its password), cannot be replayed faithfully and are skipped.
+"""
+from __future__ import annotations
+import json, time, argparse, threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from api.utils.bench_serving import percentile, request_json
+
+TOO_MANY_429 = 0.05
+
+
+def _ok(status: int) -> bool:
+    return 200 <= status < 300 or status == 304
+
+
+def _status_class(status: int) -> str:
+    return f"{status // 100}xx" if status else "error"
+
+
+def load_log(path: str, routes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                e = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(e, dict) or "method" not in e or "path" not in e:
+                continue
+            if routes and e.get("route") not in routes:
+                continue
+            entries.append(e)
+    entries.sort(key=lambda e: e.get("ts", 0.0))
+    return entries
+
+
+def _scrubbed_body(e: Dict[str, Any]) -> bool:
+    if e.get("scrubbed"):
+        return True
+    body = e.get("body")
+    # logs written before entries were flagged: look for hashed values
+    return isinstance(body, dict) and any(isinstance(v, str) and v.startswith("anon-") for v in body.values())
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    lat = sorted(latencies)
+    return {
+        "count": len(lat),
+        "p50_ms": round(percentile(lat, 50) * 1000, 1),
+        "p90_ms": round(percentile(lat, 90) * 1000, 1),
+        "p99_ms": round(percentile(lat, 99) * 1000, 1),
+        "max_ms": round(lat[-1] * 1000, 1) if lat else 0.0,
+    }
+
+
+def replay(
+    entries: List[Dict[str, Any]],
+    base_url: str,
+    *,
+    speed: Optional[float] = 1.0,
+    concurrency: int = 16,
+    token: Optional[str] = None,
+    timeout: float = 60.0,
+) -> Dict[str, Any]:
+    """
+    Re-issue `entries` against base_url. speed=None means no pacing (max speed);
+    otherwise inter-arrival gaps from the log are divided by `speed`.
+    """
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    skipped = Counter()
+    todo = []
+    for e in entries:
+        if e.get("auth") and not token:
+            skipped["needs_token"] += 1
+        elif "anon-" in e["path"]:
+            skipped["anonymized_path"] += 1
+        elif _scrubbed_body(e):
+            skipped["scrubbed_body"] += 1
+        elif e["method"] == "OPTIONS":
+            skipped["preflight"] += 1
+        else:
+            todo.append(e)
+
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    def fire(e: Dict[str, Any], scheduled: float):
+        lag = time.perf_counter() - scheduled
+        body = e.get("body") if e["method"] in ("POST", "PUT", "PATCH") else None
+        status, latency, payload = request_json(e["method"], base_url.rstrip("/") + e["path"], body,
+                                                timeout, headers)
+        verdict = payload.get("result") if isinstance(payload, dict) else None
+        with lock:
+            results.append({"entry": e, "status": status, "latency": latency, "lag": lag, "verdict": verdict})
+
+    t_start = time.perf_counter()
+    ts0 = todo[0].get("ts", 0.0) if todo else 0.0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for e in todo:
+            scheduled = t_start
+            if speed:
+                scheduled = t_start + (e.get("ts", ts0) - ts0) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(fire, e, scheduled)
+    wall = time.perf_counter() - t_start
+
+    per_route, by_class = defaultdict(list), defaultdict(list)
+    for r in results:
+        by_class[_status_class(r["status"])].append(r["latency"])
+        if _ok(r["status"]):
+            per_route[f'{r["entry"]["method"]} {r["entry"].get("route", r["entry"]["path"])}'].append(r["latency"])
+
+    diffs = []
+    for r in results:
+        recorded = r["entry"].get("verdict")
+        if recorded is not None and r["verdict"] is not None and recorded != r["verdict"]:
+            diffs.append({"claim": (r["entry"].get("body") or {}).get("claim"),
+                          "recorded": recorded, "replayed": r["verdict"]})
+    compared = sum(1 for r in results if r["entry"].get("verdict") is not None and r["verdict"] is not None)
+
+    recorded_lat = [e["duration_ms"] / 1000 for e in todo if _ok(e.get("status", 0)) and "duration_ms" in e]
+    warnings = []
+    rate_limited = sum(1 for r in results if r["status"] == 429)
+    if results and rate_limited / len(results) > TOO_MANY_429:
+        warnings.append(f"{rate_limited}/{len(results)} replies were 429: every recorded client shares this "
+                        f"host's rate-limit bucket; replay against a server with ADMISSION_RATE_PER_MIN=0")
+    return {
+        "replayed": len(results),
+        "skipped": dict(skipped),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(results) / wall, 2) if wall > 0 else 0.0,
+        "max_schedule_lag_ms": round(max((r["lag"] for r in results), default=0.0) * 1000, 1),
+        "status": dict(Counter(r["status"] for r in results)),
+        "latency": _summary([r["latency"] for r in results if _ok(r["status"])]),
+        "latency_by_status_class": {k: _summary(v) for k, v in sorted(by_class.items())},
+        "recorded_latency": _summary(recorded_lat),
+        "per_route": {k: _summary(v) for k, v in sorted(per_route.items())},
+        "verdicts_compared": compared,
+        "verdict_diffs": diffs,
+        "warnings": warnings,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("log", help="JSONL request log written with REQUEST_LOG_PATH")
+    ap.add_argument("--base", default="http://localhost:8080")
+    ap.add_argument("--speed", default="1", help="pacing multiplier (1 = original, 2 = twice as fast) or 'max'")
+    ap.add_argument("-c", "--concurrency", type=int, default=16)
+    ap.add_argument("--route", action="append", help="only replay this route template (repeatable)")
+    ap.add_argument("--token", help="bearer token for routes that required auth")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--out", help="also write the full report to this JSON file")
+    args = ap.parse_args()
+
+    speed = None if args.speed == "max" else float(args.speed)
+    entries = load_log(args.log, args.route)
+    print(f"→ replaying {len(entries)} requests from {args.log} against {args.base} "
+          f"(speed={args.speed}, c={args.concurrency})")
+
+    report = replay(entries, args.base, speed=speed, concurrency=args.concurrency,
+                    token=args.token, timeout=args.timeout)
+    printable = dict(report, verdict_diffs=report["verdict_diffs"][:20])
+    print(json.dumps(printable, indent=2, ensure_ascii=False))
+    for w in report["warnings"]:
+        print(f"! {w}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# file: api/utils/request_log.py
+"""
+Sampled, anonymized request capture to a JSONL log for load-test replay (see api.utils.replay).
+
+Enabled by setting REQUEST_LOG_PATH; REQUEST_LOG_SAMPLE (0..1, default 1.0) picks the
+fraction of requests that are recorded. One JSON object per line:
+
+    {"ts": 1718000000.123, "method": "POST", "route": "/check-claim", "path": "/check-claim",
+     "body": {"claim": "..."}, "status": 200, "duration_ms": 812.4, "verdict": "TRUE",
+     "client": "<hash>", "auth": false}
+
+Credentials are never written: passwords are dropped, emails/user ids/client addresses
+are replaced by a salted hash, and the Authorization header is reduced to a boolean.
+Entries whose body lost or hashed a field carry "scrubbed": true; replay skips them.
+"""
+from __future__ import annotations
+import os, json, time, random, hashlib, threading
+from typing import Any, Dict, Optional
+
+REQUEST_LOG_PATH   = os.getenv("REQUEST_LOG_PATH", "")
+REQUEST_LOG_SAMPLE = float(os.getenv("REQUEST_LOG_SAMPLE", "1.0"))
+_ANON_SALT         = os.getenv("REQUEST_LOG_SALT", "factshield")
+
+_DROP_FIELDS = {"password"}
+_HASH_FIELDS = {"email", "user_id"}
+
+
+def anonymize(value: Any) -> str:
+    digest = hashlib.sha256(f"{_ANON_SALT}:{value}".encode("utf-8")).hexdigest()
+    return f"anon-{digest[:12]}"
+
+
+def _is_scrubbed(body: Any) -> bool:
+    return isinstance(body, dict) and any(k in _DROP_FIELDS or k in _HASH_FIELDS for k in body)
+
+
+def _scrub(body: Any) -> Any:
+    if not isinstance(body, dict):
+        return body
+    out = {}
+    for k, v in body.items():
+        if k in _DROP_FIELDS:
+            continue
+        out[k] = anonymize(v) if k in _HASH_FIELDS else v
+    return out
+
+
+class RequestLog:
+    def __init__(self, path: str = REQUEST_LOG_PATH, sample: float = REQUEST_LOG_SAMPLE):
+        self.path = path
+        self.sample = sample
+        self._lock = threading.Lock()
+        self._fh = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.sample > 0
+
+    def sampled(self) -> bool:
+        return self.enabled and (self.sample >= 1.0 or random.random() < self.sample)
+
+    def record(
+        self,
+        *,
+        method: str,
+        route: str,
+        path: str,
+        body: Any,
+        status: int,
+        duration_s: float,
+        client: Optional[str],
+        auth: bool,
+        response: Any = None,
+        path_params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # user ids in the URL are anonymized the same way as in bodies
+        for k, v in (path_params or {}).items():
+            if k in _HASH_FIELDS:
+                path = path.replace(str(v), anonymize(v))
+
+        entry = {
+            "ts": round(time.time() - duration_s, 3),
+            "method": method,
+            "route": route,
+            "path": path,
+            "body": _scrub(body),
+            "status": status,
+            "duration_ms": round(duration_s * 1000, 1),
+            "client": anonymize(client) if client else None,
+            "auth": auth,
+        }
+        if _is_scrubbed(body):
+            entry["scrubbed"] = True
+        if isinstance(response, dict) and "result" in response:
+            entry["verdict"] = response["result"]
+
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+
+
+request_log = RequestLog()
+
+
+def install_request_log(app) -> None:
+    """Register Flask hooks that time every request and append sampled ones to the log."""
+    if not request_log.enabled:
+        return
+
+    from flask import g, request
+    from api.utils.admission import client_address
+
+    @app.before_request
+    def _request_log_start():
+        g._request_log_t0 = time.perf_counter()
+
+    @app.after_request
+    def _request_log_finish(response):
+        t0 = getattr(g, "_request_log_t0", None)
+        if t0 is None or request.method == "OPTIONS" or not request_log.sampled():
+            return response
+        request_log.record(
+            method=request.method,
+            route=request.url_rule.rule if request.url_rule else request.path,
+            path=request.full_path.rstrip("?"),
+            body=request.get_json(silent=True),
+            status=response.status_code,
+            duration_s=time.perf_counter() - t0,
+            client=client_address(request.remote_addr, request.headers.get("X-Forwarded-For")),
+            auth=bool(request.headers.get("Authorization")),
+            response=response.get_json(silent=True) if response.is_json else None,
+            path_params=request.view_args,
+        )
+        return response
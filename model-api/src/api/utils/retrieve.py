@@ -1,38 +1,153 @@
+import os, re, asyncio, threading
 from typing import List, Optional, Dict, Any
 from dataclasses import dataclass
 
 from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 
+from api.utils.lexical import LexicalIndex
+
 QDRANT_URL = "http://localhost:6333"
 COLLECTION = 'dairy_exports'
 EMBED_MODEL = "BAAI/bge-small-en-v1.5"
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") != "0"
+FUSION_CANDIDATES = 20    # per-side depth fed into reciprocal-rank fusion
+RRF_K = 60
 
 @dataclass
 class Hit:
     score: float
     payload: Dict[str, Any]
+    id: Optional[str] = None
+
+def _hit_key(hit: Hit):
+    return hit.id if hit.id is not None else hit.payload.get("fact_text")
+
+def reciprocal_rank_fusion(rankings: List[List[Hit]], top_k: int, k: int = RRF_K) -> List[Hit]:
+    """Fuse ranked lists by sum(1 / (k + rank)); the returned Hit.score is the fused score."""
+    fused: Dict[Any, float] = {}
+    first: Dict[Any, Hit] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = _hit_key(hit)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            first.setdefault(key, hit)
+    best = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+    return [Hit(score=score, payload=first[key].payload, id=first[key].id) for key, score in best]
+
+_lexical: Optional[LexicalIndex] = None
+_lexical_loaded = False
+_lexical_lock = threading.Lock()
+
+def _default_lexical() -> Optional[LexicalIndex]:
+    # loaded once per process from the records ingest wrote; None means dense-only
+    global _lexical, _lexical_loaded
+    with _lexical_lock:
+        if not _lexical_loaded:
+            _lexical = LexicalIndex.load()
+            _lexical_loaded = True
+    return _lexical
+
+def _build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    if not filters:
+        return None
+    must = []
+    for k, v in filters.items():
+        must.append(FieldCondition(key=k, match=MatchValue(value=v)))
+    return Filter(must=must)
+
+def _fuse_hybrid(lexical_index: Optional[LexicalIndex], query: str, dense: List[Hit],
+                 top_k: int, filters: Optional[Dict[str, Any]]) -> List[Hit]:
+    if lexical_index is None:
+        return dense[:top_k]
+    lexical = [Hit(score=s, payload=doc["payload"], id=str(doc["id"]))
+               for s, doc in lexical_index.search(query, limit=FUSION_CANDIDATES, filters=filters)]
+    return reciprocal_rank_fusion([dense, lexical], top_k)
 
 class Retriever:
-    def __init__(self, collection: str = COLLECTION, model_name: str = EMBED_MODEL, url: str = QDRANT_URL):
+    def __init__(self, collection: str = COLLECTION, model_name: str = EMBED_MODEL, url: str = QDRANT_URL,
+                 hybrid: bool = HYBRID_RETRIEVAL, lexical: Optional[LexicalIndex] = None):
         self.collection = collection
         self.client = QdrantClient(url=url)
         self.model = SentenceTransformer(model_name)
+        self.lexical = (lexical if lexical is not None else _default_lexical()) if hybrid else None
 
     def search(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Hit]:
         qvec = self.model.encode(query).tolist()
-        qfilter = None
-        if filters:
-            must = []
-            for k, v in filters.items():
-                must.append(FieldCondition(key=k, match=MatchValue(value=v)))
-            qfilter = Filter(must=must)
+        qfilter = _build_filter(filters)
 
         hits = self.client.search(
             collection_name=self.collection,
             query_vector=qvec,
-            limit=top_k,
+            limit=max(top_k, FUSION_CANDIDATES) if self.lexical is not None else top_k,
             query_filter=qfilter
         )
-        return [Hit(score=h.score, payload=h.payload) for h in hits]
\ No newline at end of file
+        dense = [Hit(score=h.score, payload=h.payload, id=str(h.id)) for h in hits]
+        return _fuse_hybrid(self.lexical, query, dense, top_k, filters)
+
+class AsyncRetriever:
+    """
+    Retriever for the asyncio serving mode: Qdrant calls go through AsyncQdrantClient,
+    and the (CPU-bound) embedding runs in the loop's default executor.
+    """
+    def __init__(self, collection: str = COLLECTION, model_name: str = EMBED_MODEL, url: str = QDRANT_URL,
+                 hybrid: bool = HYBRID_RETRIEVAL, lexical: Optional[LexicalIndex] = None):
+        self.collection = collection
+        self.client = AsyncQdrantClient(url=url)
+        self.model = SentenceTransformer(model_name)
+        self.lexical = (lexical if lexical is not None else _default_lexical()) if hybrid else None
+
+    async def search(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Hit]:
+        loop = asyncio.get_running_loop()
+        qvec = (await loop.run_in_executor(None, self.model.encode, query)).tolist()
+        qfilter = _build_filter(filters)
+
+        hits = await self.client.search(
+            collection_name=self.collection,
+            query_vector=qvec,
+            limit=max(top_k, FUSION_CANDIDATES) if self.lexical is not None else top_k,
+            query_filter=qfilter
+        )
+        dense = [Hit(score=h.score, payload=h.payload, id=str(h.id)) for h in hits]
+        return _fuse_hybrid(self.lexical, query, dense, top_k, filters)
+
+_NON_NUMERIC_COMMA = re.compile(r",(?!\d)")
+
+def _cache_key(query: str, top_k: int, filters: Optional[Dict[str, Any]]):
+    # "In 2014, butter ..." and "In 2014 butter ..." embed the same for our purposes
+    text = " ".join(_NON_NUMERIC_COMMA.sub(" ", query.lower()).split())
+    return (text, top_k, tuple(sorted((filters or {}).items())))
+
+class CachedRetriever:
+    """
+    Per-request memo in front of a shared Retriever, so sub-claims of one claim that
+    hit the same query are embedded and searched once. Safe to use from several threads.
+    """
+    def __init__(self, retriever: Retriever):
+        self.retriever = retriever
+        self._cache: Dict[Any, List[Hit]] = {}
+        self._lock = threading.Lock()
+
+    def search(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Hit]:
+        key = _cache_key(query, top_k, filters)
+        with self._lock:
+            hits = self._cache.get(key)
+        if hits is None:
+            hits = self.retriever.search(query, top_k=top_k, filters=filters)
+            with self._lock:
+                self._cache[key] = hits
+        return hits
+
+class AsyncCachedRetriever:
+    """CachedRetriever for AsyncRetriever; concurrent identical lookups share one task."""
+    def __init__(self, retriever: AsyncRetriever):
+        self.retriever = retriever
+        self._cache: Dict[Any, asyncio.Task] = {}
+
+    async def search(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Hit]:
+        key = _cache_key(query, top_k, filters)
+        task = self._cache.get(key)
+        if task is None:
+            task = self._cache[key] = asyncio.ensure_future(self.retriever.search(query, top_k=top_k, filters=filters))
+        return await asyncio.shield(task)
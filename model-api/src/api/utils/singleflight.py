@@ -0,0 +1,298 @@
+# file: api/utils/singleflight.py
+"""
+Single-flight coalescing of identical in-flight claim checks.
+
+The first caller for a key does the work; concurrent callers with the same key
+block on its result and all receive the same verdict. Keys are the normalized
+claim text.
+
+Within a process this is an in-memory table of pending calls. Set
+SINGLEFLIGHT_DIR to a local directory to also coalesce across worker processes:
+the leader holds an flock on <dir>/<key>.lock while it works and publishes its
+result to <dir>/<key>.json; processes that were waiting on the lock pick the
+result up instead of redoing the work. Waiting is bounded by the admission queue
+deadline, and each holder unlinks its lock file on the way out; published results
+and lock files orphaned by a crash are swept once they are older than the TTL.
+
+Both serving modes use the lock directory. The lock is only ever tried with LOCK_NB,
+so the asyncio mode polls it with asyncio.sleep and never blocks the event loop.
+"""
+from __future__ import annotations
+import os, re, json, time, asyncio, hashlib, threading
+from typing import IO, Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from api.utils.admission import AdmissionRejected, QUEUE_TIMEOUT_S
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: in-process coalescing only
+    fcntl = None
+
+SINGLEFLIGHT_DIR = os.getenv("SINGLEFLIGHT_DIR", "")
+# how long a published result may be picked up by processes that were waiting on the lock
+RESULT_TTL_S = float(os.getenv("SINGLEFLIGHT_RESULT_TTL_S", "5"))
+_LOCK_POLL_S = 0.02
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_claim(claim: str) -> str:
+    return _WS.sub(" ", claim).strip().rstrip(".!?").strip().lower()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class _LockDir:
+    """The SINGLEFLIGHT_DIR side shared by both modes: per-key flock files and published results."""
+
+    def __init__(self, lock_dir: str, result_ttl_s: float, lock_timeout_s: float):
+        self.lock_dir = lock_dir if (lock_dir and fcntl is not None) else ""
+        self.result_ttl_s = result_ttl_s
+        self.lock_timeout_s = lock_timeout_s
+        self._last_sweep = 0.0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        """(lock_path, result_path) for a key."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.lock_dir, f"{digest}.lock"), os.path.join(self.lock_dir, f"{digest}.json")
+
+    def _try_file_lock(self, lock_path: str) -> Optional[IO]:
+        """One non-blocking flock attempt on lock_path; None while another holder has it."""
+        lf = open(lock_path, "a")
+        try:
+            fcntl.flock(lf, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # the previous holder may have unlinked the file we just locked
+            if os.path.exists(lock_path) and os.path.samestat(os.fstat(lf.fileno()), os.stat(lock_path)):
+                return lf
+        except BlockingIOError:
+            pass
+        except BaseException:
+            lf.close()
+            raise
+        lf.close()
+        return None
+
+    def _lock_timeout(self) -> AdmissionRejected:
+        return AdmissionRejected("timeout", self.lock_timeout_s / 2)
+
+    def _publish(self, result_path: str, result: Dict[str, Any]) -> None:
+        tmp = f"{result_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, result_path)
+
+    def _release_file_lock(self, lock_path: str, lf: IO) -> None:
+        # unlink while still holding the lock: waiters notice the inode is gone and retry
+        try:
+            os.unlink(lock_path)
+        except OSError:
+            pass
+        fcntl.flock(lf, fcntl.LOCK_UN)
+        lf.close()
+        self._sweep()
+
+    def _sweep(self) -> None:
+        """Drop published results past the TTL and lock files left behind by crashed processes."""
+        now = time.time()
+        if now - self._last_sweep < self.result_ttl_s:
+            return
+        self._last_sweep = now
+        try:
+            names = os.listdir(self.lock_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if now - os.path.getmtime(path) < self.result_ttl_s:
+                    continue
+                if name.endswith(".lock"):
+                    with open(path, "a") as lf:
+                        try:
+                            fcntl.flock(lf, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            continue   # a live leader holds it
+                        os.unlink(path)
+                elif name.endswith((".json", ".tmp")):
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    def _read_published(self, result_path: str, started: float) -> Optional[Dict[str, Any]]:
+        try:
+            mtime = os.path.getmtime(result_path)
+        except OSError:
+            return None
+        # only results that completed while we were waiting (or very recently) count as in-flight
+        if mtime < started - self.result_ttl_s:
+            return None
+        try:
+            with open(result_path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+
+class SingleFlight(_LockDir):
+    def __init__(self, lock_dir: str = SINGLEFLIGHT_DIR, result_ttl_s: float = RESULT_TTL_S,
+                 lock_timeout_s: float = QUEUE_TIMEOUT_S):
+        super().__init__(lock_dir, result_ttl_s, lock_timeout_s)
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run fn() once per key among concurrent callers; everyone gets a copy of the same result."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.leaders += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return dict(call.result)
+
+        try:
+            call.result = self._run_leader(key, fn)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return dict(call.result)
+
+    def _run_leader(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        if not self.lock_dir:
+            return fn()
+
+        lock_path, result_path = self._paths(key)
+        started = time.time()
+
+        lf = self._acquire_file_lock(lock_path, time.monotonic() + self.lock_timeout_s)
+        try:
+            # another process finished this key while we were waiting on the lock
+            published = self._read_published(result_path, started)
+            if published is not None:
+                with self._lock:
+                    self.coalesced += 1
+                return published
+
+            result = fn()
+            self._publish(result_path, result)
+            return result
+        finally:
+            self._release_file_lock(lock_path, lf)
+
+    def _acquire_file_lock(self, lock_path: str, deadline: float) -> IO:
+        """flock lock_path, polling until `deadline`; AdmissionRejected("timeout") past it."""
+        while True:
+            lf = self._try_file_lock(lock_path)
+            if lf is not None:
+                return lf
+            if time.monotonic() >= deadline:
+                raise self._lock_timeout()
+            time.sleep(_LOCK_POLL_S)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight_keys": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "cross_process": bool(self.lock_dir),
+            }
+
+
+class AsyncSingleFlight(_LockDir):
+    """Coalescing for the asyncio serving mode: duplicates await the leader's future; with a
+    lock directory the leader also waits out other processes' leaders for the same key."""
+
+    def __init__(self, lock_dir: str = SINGLEFLIGHT_DIR, result_ttl_s: float = RESULT_TTL_S,
+                 lock_timeout_s: float = QUEUE_TIMEOUT_S):
+        super().__init__(lock_dir, result_ttl_s, lock_timeout_s)
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        fut = self._calls.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            # shield: one cancelled follower must not cancel the shared call
+            return dict(await asyncio.shield(fut))
+
+        self.leaders += 1
+        fut = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._run_leader(key, fn)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            # mark retrieved so a leader-only failure doesn't log "exception never retrieved"
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return dict(result)
+        finally:
+            self._calls.pop(key, None)
+
+    async def _run_leader(self, key: str, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if not self.lock_dir:
+            return await fn()
+
+        lock_path, result_path = self._paths(key)
+        started = time.time()
+
+        lf = await self._acquire_file_lock(lock_path, time.monotonic() + self.lock_timeout_s)
+        try:
+            published = self._read_published(result_path, started)
+            if published is not None:
+                self.coalesced += 1
+                return published
+
+            result = await fn()
+            self._publish(result_path, result)
+            return result
+        finally:
+            self._release_file_lock(lock_path, lf)
+
+    async def _acquire_file_lock(self, lock_path: str, deadline: float) -> IO:
+        while True:
+            lf = self._try_file_lock(lock_path)
+            if lf is not None:
+                return lf
+            if time.monotonic() >= deadline:
+                raise self._lock_timeout()
+            await asyncio.sleep(_LOCK_POLL_S)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight_keys": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "cross_process": bool(self.lock_dir),
+        }
+
+
+claim_flight = SingleFlight()
+async_claim_flight = AsyncSingleFlight()
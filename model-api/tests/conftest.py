@@ -0,0 +1,22 @@
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def flask_app(tmp_path_factory):
+    """
+    The api.controller app on a fresh SQLite file. SQLAlchemy resolves sqlite:///claims.db
+    against the working directory when api.model.db is imported, so tests must not import
+    it (or the controller) at module level, only after this fixture has run.
+    """
+    for module in ("google.generativeai", "sentence_transformers", "qdrant_client"):
+        pytest.importorskip(module)
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("db"))
+    try:
+        controller = importlib.import_module("api.controller")
+        yield controller.app
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+import pytest
+
+from api.utils import admission
+from api.utils.admission import AsyncInflightLimiter, InflightLimiter, TokenBucket, client_address
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", fake)
+    return fake
+
+
+def test_token_bucket_spends_burst_then_reports_wait(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_at_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(3):
+        bucket.take()
+
+    clock.now += 0.5
+    assert bucket.take() == 0.0
+    assert bucket.take() > 0
+
+    clock.now += 60
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() > 0
+
+
+def test_inflight_limiter_rejects_when_queue_full():
+    limiter = InflightLimiter(max_inflight=1, max_queue=0, timeout_s=1)
+    assert limiter.acquire() == (True, None)
+    assert limiter.acquire() == (False, "queue_full")
+    assert limiter.rejected_queue_full == 1
+
+    limiter.release()
+    assert limiter.acquire() == (True, None)
+
+
+def test_inflight_limiter_times_out_waiter():
+    limiter = InflightLimiter(max_inflight=1, max_queue=1, timeout_s=0.05)
+    assert limiter.acquire() == (True, None)
+    assert limiter.acquire() == (False, "timeout")
+    assert limiter.rejected_timeout == 1
+    assert limiter.waiting == 0
+
+
+def test_inflight_limiter_hands_released_slot_to_waiter():
+    limiter = InflightLimiter(max_inflight=1, max_queue=1, timeout_s=5)
+    limiter.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    while limiter.waiting == 0:
+        pass
+    limiter.release()
+    waiter.join(5)
+    assert results == [(True, None)]
+    assert limiter.in_flight == 1
+
+
+def test_async_inflight_limiter_rejections():
+    async def scenario():
+        limiter = AsyncInflightLimiter(max_inflight=1, max_queue=1, timeout_s=0.05)
+        first = await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        overflow = await limiter.acquire()
+        return first, overflow, await waiting
+
+    assert asyncio.run(scenario()) == ((True, None), (False, "queue_full"), (False, "timeout"))
+
+
+@pytest.mark.parametrize("forwarded, trusted, expected", [
+    (None, 0, "10.0.0.9"),
+    ("1.2.3.4", 0, "10.0.0.9"),                    # spoofable header ignored by default
+    ("6.6.6.6, 1.2.3.4", 1, "1.2.3.4"),            # one proxy: the address it appended
+    ("6.6.6.6, 1.2.3.4, 10.0.0.2", 2, "1.2.3.4"),
+    ("1.2.3.4", 2, "10.0.0.9"),                    # chain shorter than the proxy count
+])
+def test_client_address_trusts_only_configured_proxies(forwarded, trusted, expected):
+    assert client_address("10.0.0.9", forwarded, trusted) == expected
@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("a2wsgi")
+pytest.importorskip("httpx")
+
+
+@pytest.fixture
+def client(flask_app, monkeypatch):
+    from starlette.testclient import TestClient
+    from api.asgi import app, rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "rate", 0.0)   # every request comes from "testclient"
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("body", ["[1, 2]", '"a claim"', "null", '{"claim": 5}', '{"claim": "  "}', "not json"])
+@pytest.mark.parametrize("route", ["/check-claim", "/claims"])
+def test_body_without_a_claim_string_is_a_400(client, route, body):
+    resp = client.post(route, content=body, headers={"Content-Type": "application/json"})
+    assert resp.status_code == 400
+    assert resp.json() == {"error": "claim is required"}
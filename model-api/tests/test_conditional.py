@@ -0,0 +1,100 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+
+@pytest.fixture
+def db_mod(flask_app):
+    from api.model import db
+
+    return db
+
+
+@pytest.fixture
+def client(flask_app, monkeypatch):
+    from api.utils.admission import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "rate", 0.0)
+    return flask_app.test_client()
+
+
+def _escalated_claim(db_mod):
+    claim_id = str(uuid.uuid4())
+    session = db_mod.SessionLocal()
+    try:
+        session.add(db_mod.Claim(id=claim_id, claim_text=f"claim {claim_id}", status="escalated_manual"))
+        session.commit()
+    finally:
+        session.close()
+    return claim_id
+
+
+def _auth_header(db_mod):
+    from api.auth import create_token
+
+    session = db_mod.SessionLocal()
+    try:
+        user = session.query(db_mod.FactCheckerUser).first()
+        return {"Authorization": f"Bearer {create_token(user)}"}
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize("path", ["/claims/{id}", "/claims", "/claims?status=escalated_manual", "/claims/escalated"])
+def test_matching_if_none_match_is_a_bodyless_304(client, db_mod, path):
+    url = path.format(id=_escalated_claim(db_mod))
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_vote_changes_the_claim_and_collection_etags(client, db_mod):
+    claim_id = _escalated_claim(db_mod)
+    before = {url: client.get(url).headers["ETag"] for url in (f"/claims/{claim_id}", "/claims", "/claims/escalated")}
+
+    resp = client.post(f"/claims/{claim_id}/vote", json={"user_id": "u-1", "vote": "true"}, headers=_auth_header(db_mod))
+    assert resp.status_code == 200
+
+    for url, etag in before.items():
+        after = client.get(url, headers={"If-None-Match": etag})
+        assert after.status_code == 200, url
+        assert after.headers["ETag"] != etag
+
+
+def test_judge_result_changes_the_claim_etag(client, db_mod, monkeypatch):
+    import api.controller as controller
+
+    monkeypatch.setattr(controller, "judge_claim_with_gemini",
+                        lambda claim, **kw: {"result": "TRUE", "explanation": "matches"})
+    listed = client.get("/claims?status=true").headers["ETag"]
+    claim_id = client.post("/claims", json={"claim": f"judged {uuid.uuid4()}"}).get_json()["id"]
+
+    session = db_mod.SessionLocal()
+    try:
+        assert session.get(db_mod.Claim, claim_id).version == 2   # inserted at 1, touched by the verdict
+    finally:
+        session.close()
+    assert client.get("/claims?status=true", headers={"If-None-Match": listed}).status_code == 200
+
+
+def test_migrate_adds_version_columns_to_an_old_claims_table(db_mod, tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE claims (id VARCHAR PRIMARY KEY, claim_text TEXT NOT NULL, "
+                          "status VARCHAR, explanation TEXT, truth_count INTEGER, false_count INTEGER)"))
+        conn.execute(text("INSERT INTO claims (id, claim_text, status) VALUES ('old', 'old claim', 'true')"))
+    monkeypatch.setattr(db_mod, "engine", engine)
+
+    db_mod._migrate_claims()
+    db_mod._migrate_claims()   # idempotent on an already-migrated table
+
+    assert {"version", "updated_at"} <= {c["name"] for c in inspect(engine).get_columns("claims")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version, updated_at FROM claims WHERE id = 'old'")).one() == (1, None)
@@ -0,0 +1,63 @@
+import pytest
+
+from api.utils.decompose import MAX_PARTS, aggregate_verdicts, decompose_claim
+
+
+def test_compound_claim_splits_and_carries_the_year():
+    claim = "In 2014 butter exports hit 500,000 tonnes and cheese revenue was 5,575 million"
+    assert decompose_claim(claim) == [
+        "In 2014 butter exports hit 500,000 tonnes",
+        "In 2014, cheese revenue was 5,575 million",
+    ]
+
+
+def test_year_followed_by_a_comma_still_splits():
+    claim = "In 2014, butter exports hit 500,000 tonnes and cheese revenue was 5,575 million"
+    assert decompose_claim(claim) == [
+        "In 2014, butter exports hit 500,000 tonnes",
+        "In 2014, cheese revenue was 5,575 million",
+    ]
+
+
+def test_year_is_taken_from_a_later_part_when_none_precedes():
+    claim = "Butter exports hit 500,000 tonnes; cheese revenue was 5,575 million in 2014"
+    assert decompose_claim(claim) == [
+        "In 2014, Butter exports hit 500,000 tonnes",
+        "cheese revenue was 5,575 million in 2014",
+    ]
+
+
+@pytest.mark.parametrize("claim", [
+    "Between 2012 and 2014, butter exports rose by 10%.",
+    "Export revenue was between 1,000 and 2,000 million $NZ in 2013.",
+    "Cheese exports in 2013 and 2014 were 5 tonnes.",
+    "Butter exports fell in 2013 and rose in 2014.",
+    "Butter and cheese exports hit 500,000 tonnes in 2014.",
+    "New Zealand exported 10 million tonnes of butter in 2014.",
+])
+def test_single_facts_are_not_split(claim):
+    assert decompose_claim(claim) == [claim]
+
+
+def test_range_inside_a_compound_claim_stays_whole():
+    claim = ("In 2013 butter exports were 5 tonnes while casein revenue was between 100 and 200 million")
+    assert decompose_claim(claim) == [
+        "In 2013 butter exports were 5 tonnes",
+        "In 2013, casein revenue was between 100 and 200 million",
+    ]
+
+
+def test_too_many_parts_falls_back_to_the_whole_claim():
+    claim = "; ".join(f"cheese exports were {n} tonnes in 2014" for n in range(MAX_PARTS + 1))
+    assert decompose_claim(claim) == [claim]
+
+
+@pytest.mark.parametrize("results, expected", [
+    (["TRUE", "TRUE"], "TRUE"),
+    (["TRUE", "FALSE"], "FALSE"),
+    (["NOT ENOUGH EVIDENCE", "FALSE"], "FALSE"),
+    (["TRUE", "NOT ENOUGH EVIDENCE"], "NOT ENOUGH EVIDENCE"),
+    ([], "NOT ENOUGH EVIDENCE"),
+])
+def test_aggregate_verdicts(results, expected):
+    assert aggregate_verdicts([{"result": r} for r in results]) == expected
@@ -0,0 +1,149 @@
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("qdrant_client")
+
+from api.utils import detector_gemini
+from api.utils.admission import AdmissionRejected, require_admission
+from api.utils.retrieve import Hit
+
+COMPOUND = "In 2014 butter exports hit 500,000 tonnes and cheese revenue was 5,575 million"
+
+
+class FakeRetriever:
+    def search(self, query, top_k=5, filters=None):
+        return [Hit(score=1.0, payload={"fact_text": f"evidence for {query}"})]
+
+
+class FakeAsyncRetriever:
+    async def search(self, query, top_k=5, filters=None):
+        return FakeRetriever().search(query, top_k, filters)
+
+
+class FakeModel:
+    reply = '{"result": "TRUE", "explanation": "matches"}'
+
+    def generate_content(self, prompt, generation_config=None):
+        return SimpleNamespace(text=self.reply)
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        return SimpleNamespace(text=self.reply)
+
+
+class CountingSlot:
+    def __init__(self, reject_after=None):
+        self.taken = 0
+        self.reject_after = reject_after
+        self._lock = threading.Lock()
+
+    def _take(self):
+        with self._lock:
+            if self.reject_after is not None and self.taken >= self.reject_after:
+                raise AdmissionRejected("queue_full", 1)
+            self.taken += 1
+
+    @contextlib.contextmanager
+    def __call__(self):
+        self._take()
+        yield
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self):
+        self._take()
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fakes(monkeypatch):
+    monkeypatch.setattr(detector_gemini, "_get_retriever", FakeRetriever)
+    monkeypatch.setattr(detector_gemini, "_get_async_retriever", FakeAsyncRetriever)
+    monkeypatch.setattr(detector_gemini, "_ensure_gemini", lambda model_name, api_key: FakeModel())
+
+
+def test_compound_claim_takes_a_slot_per_sub_claim():
+    slot = CountingSlot()
+    result = detector_gemini.judge_claim_with_gemini(COMPOUND, slot=slot)
+    assert slot.taken == 2
+    assert result["result"] == "TRUE"
+    assert [p["claim"] for p in result["parts"]] == [
+        "In 2014 butter exports hit 500,000 tonnes", "In 2014, cheese revenue was 5,575 million"]
+
+
+def test_simple_claim_takes_one_slot():
+    slot = CountingSlot()
+    result = detector_gemini.judge_claim_with_gemini("Cheese revenue was 5,575 million in 2014", slot=slot)
+    assert slot.taken == 1
+    assert "parts" not in result
+
+
+def test_rejected_sub_claim_rejects_the_claim():
+    with pytest.raises(AdmissionRejected):
+        detector_gemini.judge_claim_with_gemini(COMPOUND, slot=CountingSlot(reject_after=1))
+
+
+def test_async_compound_claim_takes_a_slot_per_sub_claim():
+    slot = CountingSlot()
+    result = asyncio.run(detector_gemini.judge_claim_with_gemini_async(COMPOUND, slot=slot.async_slot))
+    assert slot.taken == 2
+    assert len(result["parts"]) == 2
+
+
+def test_compound_claim_is_rejected_when_the_subclaim_pool_is_saturated(monkeypatch):
+    from flask import Flask, jsonify
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    pool.submit(release.wait, 5)   # another request's sub-claim occupies the only worker
+    monkeypatch.setattr(detector_gemini, "_subclaim_pool", pool)
+    monkeypatch.setattr(detector_gemini, "SUBCLAIM_QUEUE_TIMEOUT_S", 0.1)
+
+    app = Flask(__name__)
+
+    @app.post("/check-claim")
+    @require_admission
+    def check_claim():
+        return jsonify(detector_gemini.judge_claim_with_gemini(COMPOUND))
+
+    try:
+        t0 = time.monotonic()
+        resp = app.test_client().post("/check-claim")
+        assert resp.status_code == 503
+        assert resp.get_json()["reason"] == "timeout"
+        assert "Retry-After" in resp.headers
+        assert time.monotonic() - t0 < 2
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
+    assert detector_gemini.subclaim_stats()["queued"] == 0
+
+
+def test_profiled_compound_claim_samples_the_subclaim_threads(monkeypatch):
+    from api.utils.profiler import SamplingProfiler
+
+    prof = SamplingProfiler(token="t", interval_s=0.001)
+    monkeypatch.setattr(detector_gemini, "profiler", prof)
+
+    class SlowModel(FakeModel):
+        def generate_content(self, prompt, generation_config=None):
+            time.sleep(0.05)
+            return super().generate_content(prompt, generation_config)
+
+    monkeypatch.setattr(detector_gemini, "_ensure_gemini", lambda model_name, api_key: SlowModel())
+    prof.begin("POST /check-claim")
+    try:
+        detector_gemini.judge_claim_with_gemini(COMPOUND)
+    finally:
+        prof.end()
+
+    worker_stacks = [line for line in prof.collapsed().splitlines() if "_judge_single" in line]
+    assert worker_stacks and all(line.startswith("POST /check-claim;") for line in worker_stacks)
+    assert prof.stats()["profiled_requests"] == 1
+    assert prof.stats()["in_flight_profiled"] == 0
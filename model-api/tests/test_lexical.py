@@ -0,0 +1,59 @@
+import pytest
+
+from api.utils.lexical import LexicalIndex, _normalize_number, lexical_terms
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("1,123,294", "1123294"),
+    ("1123294.0", "1123294"),
+    ("3500", "3500"),
+    ("2.50", "2.5"),
+    ("1,2x", None),
+])
+def test_normalize_number(token, expected):
+    assert _normalize_number(token) == expected
+
+
+def test_lexical_terms_types_years_numbers_and_words():
+    terms = lexical_terms("In 2012, New Zealand exported 1,123,294 tonnes of whole milk powder.")
+    assert terms == ["y:2012", "t:exported", "n:1123294", "t:tonne", "t:whole", "t:milk", "t:powder"]
+
+
+def test_lexical_terms_per_unit_and_stopwords():
+    assert lexical_terms("Average export price was 3,500 $NZ/tonne") == [
+        "t:average", "t:export", "t:price", "n:3500", "t:per-tonne"]
+    assert lexical_terms("5 million tonnes") == ["n:5", "t:tonne"]
+
+
+def test_lexical_terms_formats_of_the_same_number_match():
+    assert lexical_terms("1,123,294") == lexical_terms("1123294.0") == ["n:1123294"]
+
+
+def _record(i, product, year, text):
+    return {"id": str(i), "payload": {"product": product, "year": year, "fact_text": text}}
+
+
+def test_index_ranks_exact_year_and_number_first():
+    index = LexicalIndex([
+        _record(1, "Butter", 2013, "Butter export volume in 2013 was 480,000 tonnes"),
+        _record(2, "Butter", 2014, "Butter export volume in 2014 was 500,000 tonnes"),
+        _record(3, "Cheese", 2014, "Cheese export volume in 2014 was 330,000 tonnes"),
+    ])
+    hits = index.search("In 2014, butter exports reached exactly 500,000 tonnes.")
+    assert [doc["id"] for _, doc in hits][0] == "2"
+    assert [doc["id"] for _, doc in index.search("330,000 tonnes", filters={"product": "Cheese"})] == ["3"]
+    assert index.search("480,000 tonnes", filters={"product": "Cheese"}) == []
+
+
+def test_empty_index_searches_to_nothing():
+    index = LexicalIndex([])
+    assert len(index) == 0
+    assert index.search("butter 2014") == []
+
+
+def test_tied_scores_rank_in_record_order():
+    # butter-2014 rows outscore butter-2013 rows; within each score the earlier record wins
+    records = [_record(i, "Butter", 2014 if i % 3 == 0 else 2013, "Butter export volume") for i in range(24)]
+    index = LexicalIndex(records + [_record(i, "Cheese", 2015, "Cheese export volume") for i in range(24, 60)])
+    hits = index.search("butter 2014", limit=10)
+    assert [doc["id"] for _, doc in hits] == ["0", "3", "6", "9", "12", "15", "18", "21", "1", "2"]
@@ -0,0 +1,66 @@
+import json
+
+from api.utils import replay as replay_mod
+from api.utils.replay import load_log, replay
+from api.utils.request_log import RequestLog
+
+
+def _record(log, method, route, body, auth=False):
+    log.record(method=method, route=route, path=route, body=body, status=200,
+               duration_s=0.01, client="10.0.0.1", auth=auth)
+
+
+def test_scrubbed_bodies_are_flagged_and_skipped(tmp_path, monkeypatch):
+    path = tmp_path / "requests.jsonl"
+    log = RequestLog(path=str(path))
+    _record(log, "POST", "/auth/signin", {"email": "a@b.c", "password": "hunter2"})
+    _record(log, "POST", "/check-claim", {"claim": "Cheese exports were 5 tonnes in 2014"})
+    _record(log, "GET", "/claims", None, auth=True)
+
+    lines = [json.loads(l) for l in path.read_text().splitlines()]
+    assert "password" not in lines[0]["body"] and lines[0]["scrubbed"] is True
+    assert "scrubbed" not in lines[1]
+
+    fired = []
+    monkeypatch.setattr(replay_mod, "request_json",
+                        lambda method, url, body, timeout, headers=None: fired.append((method, url, body))
+                        or (200, 0.001, {"result": "TRUE"}))
+    report = replay(load_log(str(path)), "http://test", speed=None)
+
+    assert report["skipped"] == {"scrubbed_body": 1, "needs_token": 1}
+    assert fired == [("POST", "http://test/check-claim", {"claim": "Cheese exports were 5 tonnes in 2014"})]
+
+
+def test_unflagged_entries_with_hashed_values_are_skipped(monkeypatch):
+    entry = {"ts": 1.0, "method": "POST", "route": "/claims/<claim_id>/vote", "path": "/claims/x/vote",
+             "body": {"user_id": "anon-0123456789ab", "vote": "true"}, "auth": False}
+    monkeypatch.setattr(replay_mod, "request_json", lambda *a, **k: (200, 0.001, {}))
+    report = replay([entry], "http://test", speed=None)
+    assert report["replayed"] == 0
+    assert report["skipped"] == {"scrubbed_body": 1}
+
+
+def _entries(n):
+    return [{"ts": float(i), "method": "POST", "route": "/check-claim", "path": "/check-claim",
+             "body": {"claim": f"claim {i}"}, "status": 200, "duration_ms": 500.0} for i in range(n)]
+
+
+def test_latency_percentiles_only_count_successful_replies(monkeypatch):
+    replies = iter([(200, 0.5, {"result": "TRUE"}), (200, 0.7, {"result": "TRUE"}),
+                    (429, 0.001, {}), (404, 0.002, {}), (503, 0.003, {})])
+    monkeypatch.setattr(replay_mod, "request_json", lambda *a, **k: next(replies))
+    report = replay(_entries(5), "http://test", speed=None, concurrency=1)
+
+    assert report["latency"]["count"] == 2
+    assert report["latency"]["p50_ms"] == 600.0
+    assert report["per_route"]["POST /check-claim"]["count"] == 2
+    assert {k: v["count"] for k, v in report["latency_by_status_class"].items()} == {"2xx": 2, "4xx": 2, "5xx": 1}
+
+
+def test_warns_when_replies_are_mostly_rate_limited(monkeypatch):
+    monkeypatch.setattr(replay_mod, "request_json", lambda *a, **k: (429, 0.001, {}))
+    report = replay(_entries(4), "http://test", speed=None)
+    assert len(report["warnings"]) == 1 and "ADMISSION_RATE_PER_MIN=0" in report["warnings"][0]
+
+    monkeypatch.setattr(replay_mod, "request_json", lambda *a, **k: (200, 0.001, {}))
+    assert replay(_entries(4), "http://test", speed=None)["warnings"] == []
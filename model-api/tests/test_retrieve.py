@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("qdrant_client")
+
+from api.utils.lexical import LexicalIndex
+from api.utils.retrieve import Hit, Retriever, reciprocal_rank_fusion
+
+
+def _hits(*ids):
+    return [Hit(score=1.0, payload={"fact_text": f"fact {i}"}, id=i) for i in ids]
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([_hits("a", "b", "c"), _hits("b", "d", "a")], top_k=4, k=60)
+    assert [h.id for h in fused] == ["b", "a", "d", "c"]
+    assert fused[0].score == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_rrf_truncates_and_keeps_first_payload():
+    dense = _hits("a", "b")
+    lexical = [Hit(score=9.0, payload={"fact_text": "other"}, id="a")]
+    fused = reciprocal_rank_fusion([dense, lexical], top_k=1)
+    assert len(fused) == 1
+    assert fused[0].id == "a" and fused[0].payload == dense[0].payload
+
+
+def test_rrf_keys_hits_without_id_on_fact_text():
+    no_id = [Hit(score=1.0, payload={"fact_text": "x"}), Hit(score=1.0, payload={"fact_text": "y"})]
+    fused = reciprocal_rank_fusion([no_id, list(reversed(no_id))], top_k=5)
+    assert len(fused) == 2
+
+
+def test_retriever_keeps_an_explicit_empty_lexical_index(monkeypatch):
+    monkeypatch.setattr("api.utils.retrieve.SentenceTransformer", lambda name: None)
+    monkeypatch.setattr("api.utils.retrieve.QdrantClient", lambda url: None)
+    monkeypatch.setattr("api.utils.retrieve._default_lexical", lambda: pytest.fail("must not load the default"))
+    empty = LexicalIndex([])
+    assert Retriever(lexical=empty).lexical is empty
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from api.utils.admission import AdmissionRejected
+from api.utils.singleflight import AsyncSingleFlight, SingleFlight, normalize_claim
+
+fcntl = pytest.importorskip("fcntl")
+
+
+def _run_concurrently(flight, key, fn, n):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_normalize_claim_ignores_case_whitespace_and_final_punctuation():
+    assert normalize_claim("  In 2014   butter\nexports rose. ") == normalize_claim("in 2014 butter exports rose")
+
+
+def test_followers_share_the_leader_result():
+    flight = SingleFlight(lock_dir="")
+    release, calls = threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return {"result": "TRUE"}
+
+    threads, results, errors = _run_concurrently(flight, "k", fn, 4)
+    while flight.stats()["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"result": "TRUE"}] * 4 and not errors
+    assert flight.stats() == {"in_flight_keys": 0, "leaders": 1, "coalesced": 3, "cross_process": False}
+    results[0]["result"] = "FALSE"
+    assert results[1]["result"] == "TRUE"
+
+
+def test_leader_error_propagates_to_followers_and_is_not_cached():
+    flight = SingleFlight(lock_dir="")
+    release = threading.Event()
+
+    def boom():
+        release.wait(5)
+        raise RuntimeError("gemini down")
+
+    threads, results, errors = _run_concurrently(flight, "k", boom, 3)
+    while flight.stats()["coalesced"] < 2:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert not results
+    assert [str(e) for e in errors] == ["gemini down"] * 3
+    assert flight.do("k", lambda: {"result": "TRUE"}) == {"result": "TRUE"}
+
+
+def test_cross_process_result_is_published_and_lock_removed(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    assert flight.do("k", lambda: {"result": "TRUE"}) == {"result": "TRUE"}
+    assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
+
+    # a process that was waiting on the lock picks the published result up
+    other = SingleFlight(lock_dir=str(tmp_path))
+    assert other.do("k", lambda: pytest.fail("should reuse the published result")) == {"result": "TRUE"}
+
+
+def test_lock_wait_is_bounded_by_deadline(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path), lock_timeout_s=0.1)
+    flight.do("k", lambda: {"result": "TRUE"})   # learn the lock file name
+    lock_path = str(next(tmp_path.glob("*.json"))).replace(".json", ".lock")
+
+    with open(lock_path, "a") as held:   # another process is the leader
+        fcntl.flock(held, fcntl.LOCK_EX)
+        t0 = time.monotonic()
+        with pytest.raises(AdmissionRejected) as exc:
+            flight.do("k", lambda: {"result": "FALSE"})
+        assert exc.value.reason == "timeout"
+        assert time.monotonic() - t0 < 2
+
+
+def test_sweep_removes_expired_results_and_orphaned_locks(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path), result_ttl_s=60)
+    stale = time.time() - 120
+    for name in ("old.json", "old.lock", "old.json.123.tmp"):
+        (tmp_path / name).write_text("{}")
+        os.utime(tmp_path / name, (stale, stale))
+    (tmp_path / "held.lock").write_text("")
+    os.utime(tmp_path / "held.lock", (stale, stale))
+
+    with open(tmp_path / "held.lock", "a") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        flight.do("fresh", lambda: {"result": "TRUE"})
+
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert "held.lock" in names
+    assert not any(n.startswith("old") for n in names)
+    assert len([n for n in names if n.endswith(".json")]) == 1
+
+
+def test_async_mode_shares_the_lock_directory(tmp_path):
+    async def judged():
+        return {"result": "TRUE"}
+
+    flight = AsyncSingleFlight(lock_dir=str(tmp_path))
+    assert flight.stats()["cross_process"] is True
+    assert asyncio.run(flight.do("k", judged)) == {"result": "TRUE"}
+    assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
+
+    # a sync worker that was waiting on the same key reuses the async leader's result
+    assert SingleFlight(lock_dir=str(tmp_path)).do("k", lambda: pytest.fail("should reuse")) == {"result": "TRUE"}
+
+
+def test_async_lock_wait_is_bounded_and_keeps_the_loop_running(tmp_path):
+    flight = AsyncSingleFlight(lock_dir=str(tmp_path), lock_timeout_s=0.2)
+    lock_path = flight._paths("k")[0]
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        with pytest.raises(AdmissionRejected) as exc:
+            await flight.do("k", lambda: pytest.fail("another process is the leader"))
+        ticker.cancel()
+        return exc.value, ticks
+
+    with open(lock_path, "a") as held:   # another process is the leader
+        fcntl.flock(held, fcntl.LOCK_EX)
+        err, ticks = asyncio.run(main())
+    assert err.reason == "timeout"
+    assert ticks >= 5
+    assert flight.stats()["in_flight_keys"] == 0